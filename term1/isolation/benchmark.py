@@ -0,0 +1,238 @@
+"""Measure the search throughput of the agents and the cost of the heuristics
+in game_agent.py on a fixed corpus of mid-game positions.
+
+For every combination of search agent and heuristic, the agent is asked for a
+move in each position of the corpus with the tournament time limit, and the
+nodes searched, alpha-beta cutoffs, completed search depth and elapsed time
+are recorded. Each heuristic is also timed on its own over the same
+positions. Results are printed as a table and can be written to a JSON file
+and compared against the results of an earlier run:
+
+    python benchmark.py --output before.json
+    ... change something ...
+    python benchmark.py --output after.json --compare before.json
+
+The corpus is stored in benchmark_positions.json as lists of moves from the
+empty board, so it does not depend on the move order of the board; use
+--generate to rebuild it. Positions are set up on boards with deterministic
+move generation, so repeated runs search the same trees.
+"""
+import argparse
+import json
+import os
+import random
+import timeit
+
+from isolation import Board, BitBoard, Deadline
+from game_agent import (MinimaxPlayer, AlphaBetaPlayer, improved_score,
+                        cover_opponent_moves, look_ahead_by_one,
+                        aggregate_heuristics, select_one_of)
+from time_manager import TimeManager
+
+TIME_LIMIT = 150  # number of milliseconds for each move, as in tournament.py
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "benchmark_positions.json")
+
+HEURISTICS = [improved_score, cover_opponent_moves, look_ahead_by_one,
+              aggregate_heuristics, select_one_of]
+
+AGENTS = [
+    ("MM_3", lambda score_fn: MinimaxPlayer(search_depth=3, score_fn=score_fn)),
+    ("AB_ID", lambda score_fn: AlphaBetaPlayer(score_fn=score_fn)),
+    ("AB_TM", lambda score_fn: AlphaBetaPlayer(score_fn=score_fn, time_manager=TimeManager())),
+]
+
+BOARDS = {"Board": Board, "BitBoard": BitBoard}
+
+
+def make_corpus(num_positions, seed=0, min_moves=6, max_moves=20):
+    """Build a corpus of positions by playing random games from a fixed seed.
+
+    Returns
+    -------
+    list<list<(int, int)>>
+        For each position, the moves leading to it from the empty board. Only
+        positions where the player to move still has legal moves are kept.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    while len(corpus) < num_positions:
+        game = Board("Player1", "Player2")
+        history = []
+        for _ in range(rng.randint(min_moves, max_moves)):
+            moves = sorted(game.get_legal_moves())
+            if not moves:
+                break
+            move = rng.choice(moves)
+            game.apply_move(move)
+            history.append(move)
+        if game.get_legal_moves():
+            corpus.append(history)
+    return corpus
+
+
+def load_corpus(path=CORPUS_FILE):
+    """ Load a corpus written by --generate. """
+    with open(path) as f:
+        return [[tuple(move) for move in moves] for moves in json.load(f)]
+
+
+def setup_position(board_class, moves, player_1, player_2):
+    """ Replay a corpus entry on a new board with deterministic move order. """
+    game = board_class(player_1, player_2, random_moves=False)
+    for move in moves:
+        game.apply_move(move)
+    return game
+
+
+def bench_search(name, make_agent, score_fn, corpus, board_class, time_limit):
+    """Ask an agent for a move in every position of the corpus and collect
+    its search statistics.
+    """
+    nodes = 0
+    cutoffs = 0
+    depths = []
+    elapsed = 0.
+    timeouts = 0
+    for moves in corpus:
+        agent = make_agent(score_fn)
+        # seat the agent as the player to move
+        if len(moves) % 2 == 0:
+            game = setup_position(board_class, moves, agent, "Opponent")
+        else:
+            game = setup_position(board_class, moves, "Opponent", agent)
+
+        start = timeit.default_timer()
+        time_left = Deadline(time_limit)
+        agent.get_move(game, time_left)
+        duration = timeit.default_timer() - start
+        if time_left() < 0:
+            timeouts += 1
+
+        nodes += agent.nodes_searched
+        cutoffs += agent.cutoffs
+        depths.append(agent.completed_depth)
+        elapsed += duration
+
+    return {
+        "agent": name,
+        "heuristic": score_fn.__name__,
+        "positions": len(corpus),
+        "nodes": nodes,
+        "cutoffs": cutoffs,
+        "nodes_per_second": nodes / elapsed if elapsed else 0.,
+        "mean_depth": sum(depths) / len(depths),
+        "max_depth": max(depths),
+        "seconds": elapsed,
+        "timeouts": timeouts,
+    }
+
+
+def bench_heuristic(score_fn, corpus, board_class, repeat):
+    """ Time a heuristic over every position of the corpus. """
+    games = [setup_position(board_class, moves, "Player1", "Player2") for moves in corpus]
+    calls = 0
+    start = timeit.default_timer()
+    for _ in range(repeat):
+        for game in games:
+            score_fn(game, game.active_player)
+            score_fn(game, game.inactive_player)
+            calls += 2
+    elapsed = timeit.default_timer() - start
+    return {
+        "heuristic": score_fn.__name__,
+        "calls": calls,
+        "usec_per_call": 1e6 * elapsed / calls,
+    }
+
+
+def run(corpus, board_class, time_limit, repeat):
+    """ Run the whole benchmark and return the results as a dict. """
+    random.seed(0)
+    results = {
+        "board": board_class.__name__,
+        "time_limit": time_limit,
+        "search": [],
+        "heuristics": [],
+    }
+    for score_fn in HEURISTICS:
+        results["heuristics"].append(bench_heuristic(score_fn, corpus, board_class, repeat))
+        for name, make_agent in AGENTS:
+            results["search"].append(
+                bench_search(name, make_agent, score_fn, corpus, board_class, time_limit))
+    return results
+
+
+def report(results, baseline=None):
+    """Print the results as a table, with the relative change against a
+    baseline run for the throughput and depth columns when one is given.
+    """
+    def change(new, old):
+        if not old:
+            return ""
+        return " ({:+.0f}%)".format(100. * (new - old) / old)
+
+    old_search = {}
+    old_heuristics = {}
+    if baseline is not None:
+        old_search = {(r["agent"], r["heuristic"]): r for r in baseline["search"]}
+        old_heuristics = {r["heuristic"]: r for r in baseline["heuristics"]}
+
+    print("Board: {}, time limit: {} ms\n".format(results["board"], results["time_limit"]))
+    print("{:<8}{:<24}{:>20}{:>10}{:>16}{:>10}".format(
+        "Agent", "Heuristic", "Nodes/s", "Cutoffs", "Mean depth", "Timeouts"))
+    for r in results["search"]:
+        old = old_search.get((r["agent"], r["heuristic"]), {})
+        print("{:<8}{:<24}{:>20}{:>10}{:>16}{:>10}".format(
+            r["agent"], r["heuristic"],
+            "{:.0f}{}".format(r["nodes_per_second"], change(r["nodes_per_second"], old.get("nodes_per_second"))),
+            r["cutoffs"],
+            "{:.2f}{}".format(r["mean_depth"], change(r["mean_depth"], old.get("mean_depth"))),
+            r["timeouts"]))
+
+    print("\n{:<24}{:>20}".format("Heuristic", "usec/call"))
+    for r in results["heuristics"]:
+        old = old_heuristics.get(r["heuristic"], {})
+        print("{:<24}{:>20}".format(
+            r["heuristic"],
+            "{:.1f}{}".format(r["usec_per_call"], change(r["usec_per_call"], old.get("usec_per_call")))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--board", choices=sorted(BOARDS), default="BitBoard",
+                        help="board implementation to search on (default: BitBoard)")
+    parser.add_argument("--time-limit", type=int, default=TIME_LIMIT,
+                        help="milliseconds per move (default: %(default)s)")
+    parser.add_argument("--positions", type=int, default=None,
+                        help="only use the first N positions of the corpus")
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="passes over the corpus when timing heuristics")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--generate", type=int, metavar="N",
+                        help="rebuild the corpus with N positions and exit")
+    args = parser.parse_args()
+
+    if args.generate:
+        with open(CORPUS_FILE, "w") as f:
+            json.dump(make_corpus(args.generate), f)
+        return
+
+    corpus = load_corpus()[:args.positions]
+    results = run(corpus, BOARDS[args.board], args.time_limit, args.repeat)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    report(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,13 @@
 test your agent's strength against a set of known agents using tournament.py
 and include the results in your report.
 """
+import multiprocessing
+import os
 import random
 
+from isolation import Deadline, Endgame
+from isolation.symmetry import canonical_hash, transforms, transform_move
+from transposition import TranspositionTable, EXACT, LOWER, UPPER, bound_type
 
 
 class SearchTimeout(Exception):
@@ -43,8 +48,8 @@ def improved_score(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    own_moves = game.count_legal_moves(player)
+    opp_moves = game.count_legal_moves(game.get_opponent(player))
     return float(own_moves - opp_moves)
 
 
@@ -80,9 +85,7 @@ def cover_opponent_moves(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    own_moves = game.get_legal_moves(player)
-    opp_moves = game.get_legal_moves(game.get_opponent(player))
-    return float(len(set(own_moves).intersection(opp_moves)))
+    return float(game.count_common_moves(player, game.get_opponent(player)))
 
 
 def look_ahead_by_one(game, player):
@@ -90,6 +93,10 @@ def look_ahead_by_one(game, player):
     evaluate how good each of them is (using improved_score) and then sum up
     the scores to get the total score. As an additional tweak, we ignore losing positions
 
+    The child positions are never built: `Board.forecast_mobility` counts the
+    moves of both players after each move in one pass, and improved_score is
+    worked out from those counts.
+
     Parameters
     ----------
     game : `isolation.Board`
@@ -112,15 +119,19 @@ def look_ahead_by_one(game, player):
     if game.is_winner(player):
         return float("inf")
 
-    own_moves = game.get_legal_moves(player)
+    # The forecast moves are made by the active player, so after each of them
+    # the player currently waiting is to move
+    player_moves_next = player != game.active_player
     score = 0.0
-    for move in own_moves:
-        forecast_game = game.forecast_move(move)
-        s = improved_score(forecast_game, player)
-        if s == float('inf'):
-            return s
-        elif s != -float('inf'):
-            score += s
+    for next_count, moved_count in game.forecast_mobility(player):
+        if not next_count:
+            if player_moves_next:
+                continue  # improved_score is -inf, so ignore this move
+            return float('inf')
+        if player_moves_next:
+            score += next_count - moved_count
+        else:
+            score += moved_count - next_count
 
     return score
 
@@ -202,6 +213,49 @@ def custom_score_4(game, player):
 
 
 
+def _available_cores():
+    """ Return the number of cores this process may run on. """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return multiprocessing.cpu_count()
+
+
+# Shared stop counter and search agent of a ponder process, set by
+# _init_ponder_worker
+_ponder_worker = {}
+
+
+def _init_ponder_worker(generation, searcher):
+    """ Set up the stop counter and the search agent of a ponder process. """
+    _ponder_worker["generation"] = generation
+    _ponder_worker["searcher"] = searcher
+
+
+def _ponder_search(game, generation, limit):
+    """Search a position in a ponder process with iterative deepening until
+    the shared counter moves past `generation` or `limit` milliseconds pass.
+
+    Returns
+    -------
+    ((int, int, (int, int), list) or None)
+        The hash of the position, the completed depth, the best move and the
+        transposition table entries of the search; None if no iteration
+        completed.
+    """
+    searcher = _ponder_worker["searcher"]
+    shared_generation = _ponder_worker["generation"]
+    deadline = Deadline(limit)
+    searcher.time_left = lambda: -1. if shared_generation.value != generation else deadline()
+    searcher.nodes_searched = 0
+    searcher.completed_depth = 0
+    searcher._new_search(game)
+    best_move = searcher._deepen(game, 1, (-1, -1))
+    if not searcher.completed_depth:
+        return None
+    table = searcher.tables[game.move_count & 1]
+    return game.hash(), searcher.completed_depth, best_move, table.entries()
+
+
 class IsolationPlayer:
     """Base class for minimax and alphabeta agents -- this class is never
     constructed or tested directly.
@@ -223,12 +277,47 @@ class IsolationPlayer:
         Time remaining (in milliseconds) when search is aborted. Should be a
         positive value large enough to allow the function to return before the
         timer expires.
+
+    Agents attached to a `profiler.Profiler` report the nodes searched at
+    each search depth to `self.profiler`, which is None otherwise.
+
+    Searches test `self.out_of_time()` rather than calling `time_left` at
+    every node: it is True once `time_left()` is below TIMER_THRESHOLD, and
+    when `time_left` is an `isolation.Deadline` (as passed by `Board.play()`)
+    it only reads the clock every few calls.
     """
     def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.):
         self.search_depth = search_depth
         self.score = score_fn
         self.time_left = None
         self.TIMER_THRESHOLD = timeout
+        self.profiler = None
+
+        # Search statistics for the last call to get_move()
+        self.nodes_searched = 0
+        self.cutoffs = 0
+        self.completed_depth = 0
+
+    @property
+    def time_left(self):
+        """ The clock of the current move, as passed to get_move(). """
+        return self._time_left
+
+    @time_left.setter
+    def time_left(self, time_left):
+        self._time_left = time_left
+        if isinstance(time_left, Deadline):
+            self.out_of_time = time_left.checker(self.TIMER_THRESHOLD)
+        elif time_left is not None:
+            self.out_of_time = lambda: time_left() < self.TIMER_THRESHOLD
+        else:
+            self.out_of_time = None
+
+    def __getstate__(self):
+        # The clock of the last move belongs to this process
+        state = self.__dict__.copy()
+        state.update(_time_left=None, out_of_time=None)
+        return state
 
 
 class MinimaxPlayer(IsolationPlayer):
@@ -266,6 +355,9 @@ class MinimaxPlayer(IsolationPlayer):
             (-1, -1) if there are no available legal moves.
         """
         self.time_left = time_left
+        self.nodes_searched = 0
+        self.cutoffs = 0
+        self.completed_depth = 0
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
@@ -274,7 +366,11 @@ class MinimaxPlayer(IsolationPlayer):
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
-            return self.minimax(game, self.search_depth)
+            best_move = self.minimax(game, self.search_depth)
+            self.completed_depth = self.search_depth
+            if self.profiler is not None:
+                self.profiler.record_depth(self.search_depth, self.nodes_searched)
+            return best_move
 
         except SearchTimeout:
             pass  # Handle any actions required after timeout as needed
@@ -321,37 +417,57 @@ class MinimaxPlayer(IsolationPlayer):
                 each helper function or else your agent will timeout during
                 testing.
         """
-        if self.time_left() < self.TIMER_THRESHOLD:
+        if self.out_of_time():
             raise SearchTimeout()
 
         def terminal_state(game) :
             return not bool(game.get_legal_moves())
 
         def min_val(game,depth):
-            if self.time_left() < self.TIMER_THRESHOLD:
+            if self.out_of_time():
                 raise SearchTimeout()
+            self.nodes_searched += 1
             if terminal_state(game):
                 return float('+inf')
             if depth == 0:
                 return self.score(game, game.inactive_player)
 
-            return min([max_val(game.forecast_move(move), depth-1) for move in game.get_legal_moves()])
+            val = float('+inf')
+            for move in game.get_legal_moves():
+                game.push_move(move)
+                try:
+                    val = min(val, max_val(game, depth-1))
+                finally:
+                    game.pop_move()
+            return val
 
         def max_val(game,depth):
-            if self.time_left() < self.TIMER_THRESHOLD:
+            if self.out_of_time():
                 raise SearchTimeout()
+            self.nodes_searched += 1
             if terminal_state(game):
                 return float('-inf')
             if depth == 0:
                 return self.score(game, game.active_player)
 
-            return max([min_val(game.forecast_move(move), depth-1) for move in game.get_legal_moves()])
+            val = float('-inf')
+            for move in game.get_legal_moves():
+                game.push_move(move)
+                try:
+                    val = max(val, min_val(game, depth-1))
+                finally:
+                    game.pop_move()
+            return val
 
         best_move = (-1,-1)
         moves = game.get_legal_moves()
         val = float("-inf")
         for move in moves:
-            v = min_val(game.forecast_move(move), depth-1)
+            game.push_move(move)
+            try:
+                v = min_val(game, depth-1)
+            finally:
+                game.pop_move()
             if v > val:
                 val = v
                 best_move = move
@@ -362,7 +478,104 @@ class AlphaBetaPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using iterative deepening minimax
     search with alpha-beta pruning. You must finish and test this player to
     make sure it returns a good move before the search time limit expires.
+
+    Search results are cached in a transposition table keyed by the Zobrist
+    hash of the board, so positions reached by transposition are searched once
+    and each iteration of iterative deepening tries the best move of the
+    previous iteration (i.e., its principal variation) first. The remaining
+    moves are ordered by the killer heuristic (moves that caused a cutoff at
+    the same ply) and the history heuristic (moves that caused cutoffs
+    anywhere in the tree, weighted by the depth of the cutoff).
+
+    With `symmetric_table`, positions are keyed by their canonical hash
+    instead (see `isolation.symmetry`), so rotations and reflections of a
+    position share one entry. This costs a few microseconds per node, and
+    pays off mostly early in the game, while the board is still nearly
+    symmetric.
+
+    With `ponder`, the agent keeps searching during the opponent's turn: after
+    each of its moves, a worker process searches the position after the reply
+    predicted by the principal variation. The transposition table entries of
+    the ponder search are copied into the agent's tables when the opponent
+    moves, and when the opponent plays the predicted reply, the next search
+    resumes at the depth the ponder search completed. The worker runs in its
+    own process so that it does not compete with an opponent in this process
+    for the interpreter lock, but it still takes a core, so agents do not
+    ponder when this process may only run on one core, nor in daemonic
+    processes (e.g., tournament workers), which cannot start the worker.
+    tournament.py never enables pondering. Call close() to shut the worker
+    down.
+
+    Parameters
+    ----------
+    search_depth : int (optional)
+        See `IsolationPlayer`.
+
+    score_fn : callable (optional)
+        See `IsolationPlayer`.
+
+    timeout : float (optional)
+        See `IsolationPlayer`.
+
+    table_size : int (optional)
+        The number of entries in each transposition table.
+
+    opening_book : `opening_book.OpeningBook` (optional)
+        Book of precomputed moves to play without searching in the first
+        plies of the game.
+
+    endgame_blanks : int (optional)
+        Solve the game exactly, instead of searching with the heuristic, once
+        the players are in separate regions of the board or at most this many
+        open cells remain. Zero disables the endgame solver.
+
+    symmetric_table : bool (optional)
+        Share transposition table entries between symmetric positions.
+
+    time_manager : `time_manager.TimeManager` (optional)
+        Decides after each completed iteration of iterative deepening whether
+        to start the next one; if None, the search deepens until the timeout.
+
+    ponder : bool (optional)
+        Search the predicted reply during the opponent's turn. The score
+        function must be picklable (e.g., a module level function) to reach
+        the worker process.
+
+    ponder_limit : float (optional)
+        The maximum number of milliseconds to ponder on one opponent move.
     """
+    # The share of the time for a move (beyond the timeout) that the endgame
+    # solver may use before iterative deepening starts
+    ENDGAME_FRACTION = 0.25
+
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10., table_size=2**15,
+                 opening_book=None, endgame_blanks=12, symmetric_table=False,
+                 time_manager=None, ponder=False, ponder_limit=10000.):
+        super().__init__(search_depth, score_fn, timeout)
+        self.time_manager = time_manager
+        self.opening_book = opening_book
+        self.endgame_blanks = endgame_blanks
+        self.symmetric_table = symmetric_table
+        self.ponder = ponder
+        self.ponder_limit = ponder_limit
+        self._ponder_pool = None
+        self._ponder_generation = None
+        self._ponder_task = None
+        self._ponder_parity = 0
+        # (hash, completed depth, best move) of the last finished ponder search
+        self._ponder_result = None
+        self._endgames = {}
+        # The open cells of the last position given to the endgame solver, and
+        # of the last one it ran out of time on (None if it has not since)
+        self._endgame_blanks = 0
+        self._endgame_failed = None
+        # Values are stored from the point of view of this agent, so keep one
+        # table for each seat (first or second player) the agent may take
+        self.tables = [TranspositionTable(table_size), TranspositionTable(table_size)]
+        self.principal_variation = []
+        self._killers = {}
+        self._history = {}
+        self._root_ply = 0
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -394,15 +607,189 @@ class AlphaBetaPlayer(IsolationPlayer):
             Board coordinates corresponding to a legal move; may return
             (-1, -1) if there are no available legal moves.
         """
+        self.stop_pondering()
         best_move = (-1, -1)
         self.time_left = time_left
-        depth = 1
+        self.nodes_searched = 0
+        self.cutoffs = 0
+        self.completed_depth = 0
+        self.principal_variation = []
+
+        if self.opening_book is not None:
+            book_move = self.opening_book.lookup(game)
+            if book_move is not None and book_move in game.get_legal_moves():
+                self.principal_variation = [book_move]
+                return book_move
+
+        if self.endgame_blanks:
+            endgame_move = self._solve_endgame(game)
+            if endgame_move is not None:
+                self.principal_variation = [endgame_move]
+                return endgame_move
+
+        self._new_search(game)
+
+        manager = self.time_manager
+        if manager is not None:
+            manager.start(game, time_left, self.TIMER_THRESHOLD)
+
+        # Resume after the iterations completed while pondering on this position
+        result, self._ponder_result = self._ponder_result, None
+        if result is not None and result[0] == game.hash() and result[2] in game.get_legal_moves():
+            self.completed_depth = result[1]
+            best_move = result[2]
+            self.principal_variation = self._principal_variation(
+                game, self.tables[game.move_count & 1], result[1])
+        return self._deepen(game, self.completed_depth + 1, best_move, manager)
+
+    def _new_search(self, game):
+        """ Prepare the transposition table and move ordering for a search. """
+        self.tables[game.move_count & 1].new_search()
+
+        # Killer moves are tied to plies of the previous search, so start
+        # afresh, but keep a decayed history since good squares stay good
+        self._killers = {}
+        self._history = {move: score // 2 for move, score in self._history.items()}
+
+    def _deepen(self, game, depth, best_move, manager=None):
+        """Search with iterative deepening from `depth` until time runs out,
+        the game is solved or the time manager ends the search, and return the
+        best move of the last completed iteration (`best_move` if none).
+        """
+        table = self.tables[game.move_count & 1]
+
+        # Searching deeper than the number of open squares cannot change the
+        # result, nor can any search once the game is known to be won or lost
+        max_depth = len(game.get_blank_spaces())
         try:
-            while True:
+            while depth <= max_depth:
+                nodes = self.nodes_searched
                 best_move = self.alphabeta(game,depth)
+                self.completed_depth = depth
+                if self.profiler is not None:
+                    self.profiler.record_depth(depth, self.nodes_searched - nodes)
+                self.principal_variation = self._principal_variation(game, table, depth)
+                entry = table.lookup(self._table_key(game)[0])
+                if entry is not None and abs(entry[1]) == float('inf'):
+                    break
+                if manager is not None and not manager.next_iteration(
+                        depth, self.nodes_searched, best_move):
+                    break
                 depth += 1
         except SearchTimeout :
-            return best_move
+            pass
+        return best_move
+
+    def observe_move(self, game, move):
+        """Called by `isolation.Board.play()` with the board after every move
+        of either player, and with `move` None once the game is over. The
+        board is only copied to ponder.
+
+        Any ponder search is stopped; with `ponder`, a new one is started on
+        the reply predicted for the opponent after a move of this agent.
+        """
+        self.stop_pondering()
+        if not self.ponder or move is None or game.inactive_player != self:
+            return
+        if len(self.principal_variation) < 2 or self.principal_variation[0] != move:
+            return
+        reply = self.principal_variation[1]
+        if reply not in game.get_legal_moves():
+            return
+        game = game.forecast_move(reply)
+        pool = self._get_ponder_pool()
+        if pool is not None:
+            self._ponder_parity = game.move_count & 1
+            self._ponder_task = pool.apply_async(
+                _ponder_search, (game.with_players("Player1", "Player2"),
+                                 self._ponder_generation.value, self.ponder_limit))
+
+    def stop_pondering(self):
+        """Stop the ponder search, if any, wait for it to finish and keep its
+        results: the table entries, and the depth and best move for get_move()
+        in `_ponder_result`.
+        """
+        if self._ponder_task is None:
+            return
+        self._ponder_generation.value += 1
+        result = self._ponder_task.get()
+        self._ponder_task = None
+        if result is not None:
+            table = self.tables[self._ponder_parity]
+            for entry in result[3]:
+                table.store(*entry)
+            self._ponder_result = result[:3]
+
+    def _get_ponder_pool(self):
+        """ Return the ponder worker, starting it on first use. """
+        if self._ponder_pool is None and self.ponder:
+            if _available_cores() < 2:
+                # the worker would take the time of the opponent's search
+                self.ponder = False
+                return None
+            self._ponder_generation = multiprocessing.RawValue('i', 0)
+            searcher = AlphaBetaPlayer(score_fn=self.score, timeout=0.,
+                                       table_size=self.tables[0].size, endgame_blanks=0,
+                                       symmetric_table=self.symmetric_table)
+            try:
+                self._ponder_pool = multiprocessing.Pool(
+                    1, initializer=_init_ponder_worker,
+                    initargs=(self._ponder_generation, searcher))
+            except AssertionError:
+                # daemonic processes, e.g. tournament workers, cannot have
+                # children; play without pondering instead
+                self.ponder = False
+        return self._ponder_pool
+
+    def close(self):
+        """ Stop pondering and shut down the ponder worker. """
+        self.stop_pondering()
+        if self._ponder_pool is not None:
+            self._ponder_pool.terminate()
+            self._ponder_pool.join()
+            self._ponder_pool = None
+
+    def __getstate__(self):
+        # The ponder worker belongs to this process
+        state = super().__getstate__()
+        state.update(_ponder_pool=None, _ponder_generation=None, _ponder_task=None)
+        return state
+
+    def _solve_endgame(self, game):
+        """Return the move of the exact endgame solver, or None if the position
+        is not an endgame or the solver ran out of time.
+
+        The solver may use ENDGAME_FRACTION of the time left for the move;
+        whatever it has solved by then is kept for the next move. Once it runs
+        out of time, it is not tried again until fewer open cells remain (or
+        a new game starts), so that a position too big to solve does not cost
+        that time on every move.
+        """
+        blanks = len(game.get_blank_spaces())
+        if blanks > self._endgame_blanks:
+            self._endgame_failed = None
+        self._endgame_blanks = blanks
+        if self._endgame_failed is not None and blanks >= self._endgame_failed:
+            return None
+
+        key = game.geometry
+        if key not in self._endgames:
+            self._endgames[key] = Endgame(game.width, game.height, self.endgame_blanks,
+                                          move_set=key.move_set)
+
+        time_left = self.time_left()
+        time_limit = time_left - self.ENDGAME_FRACTION * (time_left - self.TIMER_THRESHOLD)
+
+        def check_time():
+            if self.time_left() < time_limit:
+                raise SearchTimeout()
+
+        try:
+            result = self._endgames[key].solve(game, check_time)
+        except SearchTimeout:
+            self._endgame_failed = blanks
+            return None
+        return None if result is None else result[0]
 
     def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf")):
         """Implement depth-limited minimax search with alpha-beta pruning as
@@ -449,55 +836,194 @@ class AlphaBetaPlayer(IsolationPlayer):
                 each helper function or else your agent will timeout during
                 testing.
         """
-        def terminal_state(game):
-            return not bool(game.get_legal_moves())
-
-        def max_val(game, depth, alpha, beta) :
-
-            if self.time_left() < self.TIMER_THRESHOLD:
-                raise SearchTimeout()
-            if terminal_state(game):
-                return float('-inf')
-            if depth == 0:
-                return self.score(game, game.active_player)
-
-            val = float('-inf')
-            for next_move in game.get_legal_moves():
-                val = max(val, min_val(game.forecast_move(next_move), depth-1, alpha, beta))
-                if val >= beta:
-                    return val
-                alpha = max(val, alpha)
-
-            return val
-
-        def min_val(game,depth,alpha,beta) :
-
-            if self.time_left() < self.TIMER_THRESHOLD:
-                raise SearchTimeout()
-            if terminal_state(game):
-                return float('+inf')
-            if depth == 0:
-                return self.score(game, game.inactive_player)
-
-            val = float('+inf')
-            for move in game.get_legal_moves():
-                val = min(val, max_val(game.forecast_move(move), depth-1, alpha, beta))
-                if val <= alpha:
-                    return val
-                beta = min(val, beta)
+        if self.out_of_time():
+            raise SearchTimeout()
+        self.nodes_searched += 1
 
-            return val
+        table = self.tables[game.move_count & 1]
+        self._root_ply = game.move_count
+        key, t = self._table_key(game)
+        moves = self._order_moves(game.get_legal_moves(), self._lookup(table, game, key, t), 0)
+        if not moves:
+            return (-1, -1)
 
-        best_move = (-1, -1)
+        # Fall back on a legal move even if every move loses
+        best_move = moves[0]
         val = float('-inf')
-        for move in game.get_legal_moves():
-            new_game = game.forecast_move(move)
-            v = min_val(new_game, depth-1, alpha, beta)
+        alpha_orig = alpha
+        for move in moves:
+            game.push_move(move)
+            try:
+                v = self._min_value(game, depth-1, alpha, beta, table)
+            finally:
+                game.pop_move()
             if v > val:
                 val = v
                 best_move = move
             alpha = max(alpha,v)
 
+        self._store(table, game, key, t, depth, val, bound_type(val, alpha_orig, beta), best_move)
         return best_move
 
-
+    def _table_key(self, game):
+        """Return the transposition table key of a position and the index of
+        the symmetry that maps the position onto the orientation of the key,
+        or None if keys are plain hashes.
+        """
+        if self.symmetric_table:
+            return canonical_hash(game)
+        return game.hash(), None
+
+    def _lookup(self, table, game, key, t):
+        """ Look up a position, with the best move in the orientation of `game`. """
+        entry = table.lookup(key)
+        if t is None or entry is None or entry[3] is None:
+            return entry
+        inverse = transforms(game.width, game.height, game.geometry.move_set)[1][t]
+        return entry[:3] + (transform_move(entry[3], inverse, game.height),)
+
+    def _store(self, table, game, key, t, depth, value, flag, move):
+        """ Store a search result, with the best move in the orientation of the key. """
+        if t is not None and move is not None:
+            perm = transforms(game.width, game.height, game.geometry.move_set)[0][t]
+            move = transform_move(move, perm, game.height)
+        table.store(key, depth, value, flag, move)
+
+    def _order_moves(self, moves, entry, ply):
+        """Sort moves so that the best move recorded in a transposition table
+        entry comes first, then the killer moves for the ply, then the rest by
+        decreasing history score.
+        """
+        history = self._history
+        killers = self._killers.get(ply, ())
+        tt_move = entry[3] if entry is not None else None
+
+        def rank(move):
+            if move == tt_move:
+                return float('inf')
+            if move in killers:
+                return 1e9
+            return history.get(move, 0)
+
+        moves.sort(key=rank, reverse=True)
+        return moves
+
+    def _record_cutoff(self, move, depth, ply):
+        """Update the killer and history heuristics after `move` caused a
+        cutoff `depth` plies above the search horizon.
+        """
+        killers = self._killers.setdefault(ply, [None, None])
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self._history[move] = self._history.get(move, 0) + depth * depth
+
+    def _principal_variation(self, game, table, depth):
+        """Follow the best moves stored in the transposition table from the
+        current position to recover the expected line of play.
+        """
+        variation = []
+        try:
+            while len(variation) < depth:
+                entry = self._lookup(table, game, *self._table_key(game))
+                if entry is None or entry[3] is None or not game.move_is_legal(entry[3]):
+                    break
+                variation.append(entry[3])
+                game.push_move(entry[3])
+        finally:
+            for _ in variation:
+                game.pop_move()
+        return variation
+
+    def _probe(self, entry, depth, alpha, beta):
+        """Return the value of a transposition table entry if it was searched
+        at least `depth` plies and settles the (alpha, beta) window, or None.
+        """
+        entry_depth, value, flag, _ = entry
+        if entry_depth >= depth:
+            if (flag == EXACT or (flag == LOWER and value >= beta) or
+                    (flag == UPPER and value <= alpha)):
+                return value
+        return None
+
+    def _max_value(self, game, depth, alpha, beta, table):
+        """Value of a position where this agent is to move. """
+        if self.out_of_time():
+            raise SearchTimeout()
+        self.nodes_searched += 1
+        moves = game.get_legal_moves()
+        if not moves:
+            return float('-inf')
+        if depth == 0:
+            return self.score(game, game.active_player)
+
+        key, t = self._table_key(game)
+        entry = self._lookup(table, game, key, t)
+        if entry is not None:
+            value = self._probe(entry, depth, alpha, beta)
+            if value is not None:
+                return value
+        ply = game.move_count - self._root_ply
+        moves = self._order_moves(moves, entry, ply)
+
+        alpha_orig = alpha
+        val = float('-inf')
+        best_move = None
+        for next_move in moves:
+            game.push_move(next_move)
+            try:
+                v = self._min_value(game, depth-1, alpha, beta, table)
+            finally:
+                game.pop_move()
+            if v > val:
+                val = v
+                best_move = next_move
+            if val >= beta:
+                self.cutoffs += 1
+                self._record_cutoff(next_move, depth, ply)
+                break
+            alpha = max(val, alpha)
+
+        self._store(table, game, key, t, depth, val, bound_type(val, alpha_orig, beta), best_move)
+        return val
+
+    def _min_value(self, game, depth, alpha, beta, table):
+        """Value of a position where the opponent is to move. """
+        if self.out_of_time():
+            raise SearchTimeout()
+        self.nodes_searched += 1
+        moves = game.get_legal_moves()
+        if not moves:
+            return float('+inf')
+        if depth == 0:
+            return self.score(game, game.inactive_player)
+
+        key, t = self._table_key(game)
+        entry = self._lookup(table, game, key, t)
+        if entry is not None:
+            value = self._probe(entry, depth, alpha, beta)
+            if value is not None:
+                return value
+        ply = game.move_count - self._root_ply
+        moves = self._order_moves(moves, entry, ply)
+
+        beta_orig = beta
+        val = float('+inf')
+        best_move = None
+        for move in moves:
+            game.push_move(move)
+            try:
+                v = self._max_value(game, depth-1, alpha, beta, table)
+            finally:
+                game.pop_move()
+            if v < val:
+                val = v
+                best_move = move
+            if val <= alpha:
+                self.cutoffs += 1
+                self._record_cutoff(move, depth, ply)
+                break
+            beta = min(val, beta)
+
+        self._store(table, game, key, t, depth, val, bound_type(val, alpha, beta_orig), best_move)
+        return val
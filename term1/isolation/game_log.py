@@ -0,0 +1,179 @@
+"""Append-only binary log of played games, and a reader that replays them.
+
+Tournaments write one record per game, so losses can be analysed and
+training corpora built without playing the games again:
+
+    python tournament.py --log games.bin
+
+    for record in read_games("games.bin"):
+        for game, move in replay(record):
+            ...
+
+The file starts with a short header, followed by the records back to back.
+Each record is a fixed-size header (its length in bytes, the game seed, the
+board size, the winner, the termination reason and the move counts) followed
+by the names of the two agents, the cell index of every move, starting with
+the opening moves played before the agents took over, and the think time of
+every move the agents chose (float milliseconds), plus the move that ended
+the game. Records are written through a large buffer so that logging between
+games does not touch the disk while moves are being timed.
+"""
+import struct
+
+from collections import namedtuple
+
+from isolation import Board
+
+MAGIC = b"ISOG"
+HEADER = struct.Struct("<4sB")
+VERSION = 1
+RECORD = struct.Struct("<IIBBBBHH")
+NAME = struct.Struct("<B")
+
+TERMINATIONS = ("illegal move", "forfeit", "timeout")
+
+GameRecord = namedtuple("GameRecord", ["agents", "seed", "width", "height", "moves", "opening",
+                                       "think_times", "winner", "termination"])
+GameRecord.__doc__ = """A logged game.
+
+agents : (str, str)
+    The names of the first and second player.
+seed : int
+    The seed the game was played with.
+width, height : int
+    The size of the board.
+moves : list<(int, int)>
+    Every move of the game from the empty board.
+opening : int
+    The number of moves at the start of `moves` made before the agents took
+    over.
+think_times : list<float>
+    The milliseconds taken to choose each move after the opening, and the
+    move that ended the game.
+winner : int
+    0 if the first player won, 1 if the second player won.
+termination : str
+    The reason the loser lost, as returned by `isolation.Board.play()`.
+"""
+
+# The players of replayed boards
+LoggedAgent = namedtuple("LoggedAgent", ["seat", "name"])
+
+
+def encode(record):
+    """Return the bytes of a record. Names are cut to 255 bytes; boards of more
+    than 256 cells, whose cell indices do not fit a byte, raise ValueError.
+    """
+    height = record.height
+    if record.width * height > 256:
+        raise ValueError("cannot log a {}x{} board: moves are stored in one byte".format(
+            record.width, height))
+    # cut at a character boundary, so the name still decodes
+    names = [name.encode("utf-8")[:255].decode("utf-8", "ignore").encode("utf-8")
+             for name in record.agents]
+    body = b"".join(NAME.pack(len(name)) + name for name in names)
+    body += bytes(r + c * height for r, c in record.moves)
+    body += struct.pack("<{}f".format(len(record.think_times)), *record.think_times)
+    header = RECORD.pack(RECORD.size + len(body), record.seed, record.width, height,
+                         record.winner, TERMINATIONS.index(record.termination),
+                         len(record.moves), record.opening)
+    return header + body
+
+
+def decode(data):
+    """ Return the record encoded at the start of a bytes object. """
+    (_, seed, width, height, winner, termination,
+     num_moves, opening) = RECORD.unpack_from(data)
+    offset = RECORD.size
+    agents = []
+    for _ in range(2):
+        length, = NAME.unpack_from(data, offset)
+        offset += NAME.size
+        agents.append(data[offset:offset + length].decode("utf-8"))
+        offset += length
+    moves = [(idx % height, idx // height) for idx in data[offset:offset + num_moves]]
+    offset += num_moves
+    num_times = (len(data) - offset) // 4
+    think_times = list(struct.unpack_from("<{}f".format(num_times), data, offset))
+    return GameRecord(tuple(agents), seed, width, height, moves, opening, think_times,
+                      winner, TERMINATIONS[termination])
+
+
+class GameLog(object):
+    """Writer appending game records to a log file.
+
+    Parameters
+    ----------
+    path : str
+        The log file; created with a header if it does not exist.
+
+    buffer_size : int (optional)
+        Bytes of records kept in memory before they are written out.
+    """
+    def __init__(self, path, buffer_size=2**20):
+        self.path = path
+        self._file = open(path, "ab", buffering=buffer_size)
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, VERSION))
+
+    def write(self, record):
+        """ Append a GameRecord to the log. """
+        self._file.write(encode(record))
+
+    def flush(self):
+        """ Write the buffered records to the file. """
+        self._file.flush()
+
+    def close(self):
+        """ Write the buffered records and close the file. """
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_games(path):
+    """Read the records of a log file one at a time, so logs of any size can
+    be streamed.
+
+    Yields
+    ------
+    GameRecord
+        The games in the order they were logged. A record cut short, e.g.,
+        because the writer was killed, ends the stream.
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size or HEADER.unpack(header)[0] != MAGIC:
+            raise ValueError("{} is not a game log".format(path))
+        while True:
+            data = f.read(RECORD.size)
+            if len(data) < RECORD.size:
+                return
+            length, = struct.unpack_from("<I", data)
+            data += f.read(length - RECORD.size)
+            if len(data) < length:
+                return
+            yield decode(data)
+
+
+def replay(record, board_class=Board):
+    """Replay a logged game.
+
+    The players of the board are LoggedAgent tuples holding the seat and name
+    of each agent.
+
+    Yields
+    ------
+    (isolation.Board, (int, int))
+        A copy of the board before each move of the game, and the move played
+        in that position.
+    """
+    board = board_class(LoggedAgent(0, record.agents[0]), LoggedAgent(1, record.agents[1]),
+                        record.width, record.height)
+    for move in record.moves:
+        yield board.copy(), move
+        board.apply_move(move)
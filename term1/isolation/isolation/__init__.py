@@ -9,3 +9,7 @@ legal moves loses, and the opponent is declared the winner.
 
 # Make the Board class available at the root of the module for imports
 from .isolation import Board
+from .bitboard import BitBoard
+from .endgame import Endgame
+from .deadline import Deadline
+from .geometry import KING, KNIGHT, move_geometry
@@ -0,0 +1,380 @@
+"""
+This file contains the `BitBoard` class, a drop-in replacement for
+`isolation.Board` that stores the blocked cells of the board in a single
+integer bitmask instead of a list.
+
+Bit `i` of the mask corresponds to `Board._board_state[i]`, i.e., the cell at
+(row, column) = (i % height, i // height). Legal moves are found by masking a
+precomputed table of the moves from each cell (see `isolation.geometry`) with
+the open cells of the board, so move generation, copying and terminal tests no
+longer loop over the board in Python.
+"""
+import random
+
+from .geometry import KNIGHT, move_geometry
+from .isolation import Board
+from .zobrist import zobrist_keys, hash_state
+
+
+def _popcount(mask):
+    """ Return the number of set bits in a non-negative integer. """
+    return bin(mask).count("1")
+
+
+# int.bit_count() is only available from Python 3.10
+popcount = getattr(int, "bit_count", _popcount)
+
+
+def position_masks(game):
+    """Return the cell index of the player to move, the cell index of the
+    waiting player (None for a player that has not moved) and the bitmask of
+    open cells of any Board or BitBoard.
+    """
+    if isinstance(game, BitBoard):
+        blocked = game._blocked
+        locations = game._locations
+    else:
+        state = game._board_state
+        blocked = sum(1 << idx for idx in range(game.width * game.height) if state[idx])
+        locations = [state[-1], state[-2]]
+    seat = game.move_count & 1
+    full = (1 << (game.width * game.height)) - 1
+    return locations[seat], locations[1 - seat], full & ~blocked
+
+
+class BitBoard(Board):
+    """Implement a model for the game Isolation assuming each player moves like
+    a knight in chess, using an integer bitmask to track the blocked cells.
+
+    The public interface is identical to `isolation.Board`, so instances can
+    be used anywhere a `Board` is expected.
+
+    Parameters
+    ----------
+    player_1 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    player_2 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    width : int (optional)
+        The number of columns that the board should have.
+
+    height : int (optional)
+        The number of rows that the board should have.
+
+    random_moves : bool (optional)
+        If True (the default), get_legal_moves() returns the moves in random
+        order. If False, the moves are always returned in the same order
+        (increasing cell index, i.e., column by column), which makes searches
+        reproducible and cheaper; agents that want random move order can call
+        randomize_moves() explicitly.
+
+    move_set : sequence<(int, int)> (optional)
+        The (row, column) offsets of the moves the players can make, or a
+        `MoveGeometry`; knight moves by default (see `isolation.geometry`).
+    """
+
+    def __init__(self, player_1, player_2, width=7, height=7, random_moves=True,
+                 move_set=KNIGHT):
+        self.width = width
+        self.height = height
+        self.random_moves = random_moves
+        self.move_count = 0
+        self._player_1 = player_1
+        self._player_2 = player_2
+        self._active_player = player_1
+        self._inactive_player = player_2
+
+        self.geometry = move_geometry(width, height, move_set)
+        self._masks = self.geometry.masks
+        self._coords = self.geometry.coords
+        self._full = (1 << (width * height)) - 1
+
+        # Bitmask of the blocked cells, and the cell index of the last move of
+        # player 1 and player 2 respectively
+        self._blocked = 0
+        self._locations = [Board.NOT_MOVED, Board.NOT_MOVED]
+        self._undo_stack = []
+
+        self._zobrist = zobrist_keys(width, height)
+        self._hash = 0
+
+    @property
+    def _board_state(self):
+        """The board state in the list layout used by `isolation.Board`. """
+        state = [(self._blocked >> idx) & 1 for idx in range(self.width * self.height)]
+        state += [self.move_count & 1, self._locations[1], self._locations[0]]
+        return state
+
+    @_board_state.setter
+    def _board_state(self, state):
+        size = self.width * self.height
+        self._blocked = sum(1 << idx for idx in range(size) if state[idx])
+        self._locations = [state[-1], state[-2]]
+        self._hash = hash_state(state, self.width, self.height)
+
+    def _seat(self, player):
+        """ Return 0 for player 1 and 1 for player 2. """
+        if player == self._player_1:
+            return 0
+        elif player == self._player_2:
+            return 1
+        raise RuntimeError(
+            "Invalid player in get_player_location: {}".format(player))
+
+    def _moves_mask(self, seat):
+        """ Return the bitmask of open cells reachable by the given seat. """
+        loc = self._locations[seat]
+        if loc is Board.NOT_MOVED:
+            return self._full & ~self._blocked
+        return self._masks[loc] & ~self._blocked
+
+    def _to_moves(self, mask):
+        """ Convert a bitmask of cells into a list of (row, column) pairs. """
+        coords = self._coords
+        moves = []
+        while mask:
+            low = mask & -mask
+            moves.append(coords[low.bit_length() - 1])
+            mask ^= low
+        return moves
+
+    def copy(self):
+        """ Return a deep copy of the current board. """
+        new_board = BitBoard(self._player_1, self._player_2, width=self.width, height=self.height,
+                             random_moves=self.random_moves, move_set=self.geometry)
+        new_board.move_count = self.move_count
+        new_board._active_player = self._active_player
+        new_board._inactive_player = self._inactive_player
+        new_board._blocked = self._blocked
+        new_board._locations = self._locations[:]
+        new_board._hash = self._hash
+        return new_board
+
+    def move_is_legal(self, move):
+        """Test whether a move is legal in the current game state.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        -------
+        bool
+            Returns True if the move is legal, False otherwise
+        """
+        return (0 <= move[0] < self.height and 0 <= move[1] < self.width and
+                not (self._blocked >> (move[0] + move[1] * self.height)) & 1)
+
+    def get_blank_spaces(self):
+        """Return a list of the locations that are still available on the board.
+        """
+        return self._to_moves(self._full & ~self._blocked)
+
+    def get_player_location(self, player):
+        """Find the current location of the specified player on the board.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        -------
+        (int, int) or None
+            The coordinate pair (row, column) of the input player, or None
+            if the player has not moved.
+        """
+        loc = self._locations[self._seat(player)]
+        if loc is Board.NOT_MOVED:
+            return Board.NOT_MOVED
+        return self._coords[loc]
+
+    def get_legal_moves(self, player=None):
+        """Return the list of all legal moves for the specified player.
+
+        As in `isolation.Board`, the moves are shuffled unless the board was
+        created with `random_moves=False`.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the legal moves for the active player on the board.
+
+        Returns
+        -------
+        list<(int, int)>
+            The list of coordinate pairs (row, column) of all legal moves
+            for the player constrained by the current game state.
+        """
+        if player is None:
+            seat = self.move_count & 1
+        else:
+            seat = self._seat(player)
+        valid_moves = self._to_moves(self._moves_mask(seat))
+        if self.random_moves:
+            random.shuffle(valid_moves)
+        return valid_moves
+
+    def count_legal_moves(self, player=None):
+        """Return the number of legal moves for the specified player. This is
+        len(get_legal_moves(player)) without building or shuffling the list.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            count the legal moves for the active player on the board.
+
+        Returns
+        -------
+        int
+            The number of legal moves for the player.
+        """
+        if player is None:
+            seat = self.move_count & 1
+        else:
+            seat = self._seat(player)
+        return popcount(self._moves_mask(seat))
+
+    def count_common_moves(self, player, other):
+        """Return the number of cells that are legal moves for both players,
+        i.e., len(set(get_legal_moves(player)) & set(get_legal_moves(other))).
+        """
+        return popcount(self._moves_mask(self._seat(player)) &
+                        self._moves_mask(self._seat(other)))
+
+    def forecast_mobility(self, player=None):
+        """Count the legal moves of both players after each of the legal moves
+        of the specified player, in a single pass and without copying the
+        board. See `isolation.Board.forecast_mobility()`.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            use the legal moves of the active player on the board.
+
+        Returns
+        -------
+        list<(int, int)>
+            For each legal move of the player, the number of legal moves of
+            the player to move and of the player that moved.
+        """
+        if player is None:
+            seat = self.move_count & 1
+        else:
+            seat = self._seat(player)
+        masks = self._masks
+        open_cells = self._full & ~self._blocked
+        waiting_mask = self._moves_mask(1 - (self.move_count & 1))
+        mask = self._moves_mask(seat)
+
+        mobility = []
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            mobility.append((popcount(waiting_mask & ~low),
+                             popcount(masks[low.bit_length() - 1] & open_cells)))
+        return mobility
+
+    def apply_move(self, move):
+        """Move the active player to a specified location.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        idx = move[0] + move[1] * self.height
+        seat = self.move_count & 1
+        blocked, locations, side = self._zobrist
+        prev_idx = self._locations[seat]
+        if prev_idx is not Board.NOT_MOVED:
+            self._hash ^= locations[seat][prev_idx]
+        self._hash ^= blocked[idx] ^ locations[seat][idx] ^ side
+        self._locations[seat] = idx
+        self._blocked |= 1 << idx
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count += 1
+
+    def push_move(self, move):
+        """Apply a move in place, recording what is needed to take it back
+        with `pop_move()`.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        self._undo_stack.append(self._locations[self.move_count & 1])
+        self.apply_move(move)
+
+    def pop_move(self):
+        """Undo the most recent move made with `push_move()`.
+
+        Returns
+        -------
+        (int, int)
+            The coordinate pair (row, column) of the move taken back.
+        """
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count -= 1
+        seat = self.move_count & 1
+        idx = self._locations[seat]
+        prev_idx = self._undo_stack.pop()
+        blocked, locations, side = self._zobrist
+        if prev_idx is not Board.NOT_MOVED:
+            self._hash ^= locations[seat][prev_idx]
+        self._hash ^= blocked[idx] ^ locations[seat][idx] ^ side
+        self._blocked ^= 1 << idx
+        self._locations[seat] = prev_idx
+        return self._coords[idx]
+
+    def is_winner(self, player):
+        """ Test whether the specified player has won the game. """
+        return player == self._inactive_player and not self._moves_mask(self.move_count & 1)
+
+    def is_loser(self, player):
+        """ Test whether the specified player has lost the game. """
+        return player == self._active_player and not self._moves_mask(self.move_count & 1)
+
+    def utility(self, player):
+        r"""Returns the utility of the current game state from the perspective
+        of the specified player.
+
+                    /  +infinity,   "player" wins
+        utility =  |   -infinity,   "player" loses
+                    \          0,    otherwise
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the utility for the active player on the board.
+
+        Returns
+        ----------
+        float
+            The utility value of the current game state for the specified
+            player. The game has a utility of +inf if the player has won,
+            a value of -inf if the player has lost, and a value of 0
+            otherwise.
+        """
+        if not self._moves_mask(self.move_count & 1):
+
+            if player == self._inactive_player:
+                return float("inf")
+
+            if player == self._active_player:
+                return float("-inf")
+
+        return 0.
@@ -0,0 +1,56 @@
+"""
+This file contains the move clock passed to the players by `Board.play()`.
+
+A `Deadline` is a callable returning the milliseconds left in the turn, so it
+can be used anywhere a `time_left` function is expected. Searches that test
+the clock at every node can instead use a checker from `checker()`, which
+compares against a precomputed stop time and only reads the clock once every
+few calls, since consecutive nodes are microseconds apart.
+"""
+import timeit
+
+
+class Deadline(object):
+    """The clock of one turn.
+
+    Parameters
+    ----------
+    time_limit : numeric
+        The number of milliseconds from now at which the turn ends.
+
+    clock : callable (optional)
+        Returns the current time in seconds.
+    """
+    __slots__ = ("end", "clock")
+
+    def __init__(self, time_limit, clock=timeit.default_timer):
+        self.clock = clock
+        self.end = clock() + time_limit / 1000.
+
+    def __call__(self):
+        """ Return the number of milliseconds left in the turn. """
+        return 1000. * (self.end - self.clock())
+
+    def checker(self, threshold, interval=16):
+        """Return a function that returns True once fewer than `threshold`
+        milliseconds are left in the turn.
+
+        The clock is read on the first call and then once every `interval`
+        calls; in between, the function returns False. Once the time is up,
+        every call reads the clock and returns True.
+        """
+        stop = self.end - threshold / 1000.
+        clock = self.clock
+        count = 1
+
+        def expired():
+            nonlocal count
+            count -= 1
+            if count:
+                return False
+            if clock() >= stop:
+                count = 1
+                return True
+            count = interval
+            return False
+        return expired
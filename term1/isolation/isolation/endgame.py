@@ -0,0 +1,204 @@
+"""
+This file contains an exact solver for isolation endgames.
+
+Once no open cell can be reached by both players, the players can no longer
+interfere with each other and the game reduces to a longest path problem in
+each player's region: the player to move wins if and only if its longest
+path is strictly longer than the opponent's. Regions are found by flood fill
+over the moves of the players on the bitmask of open cells, and longest paths
+are memoised on (cell, open cells of the region).
+
+Positions that are not partitioned yet are solved exactly by a win/loss
+search once few open cells remain, switching to the longest path rule as soon
+as a line of play partitions the board.
+"""
+from .bitboard import popcount, position_masks
+from .geometry import KNIGHT, move_geometry
+
+
+class Endgame(object):
+    """Exact endgame solver for boards of a given size.
+
+    Results are memoised across calls, so a solver can be kept for a whole
+    game (or many games) and work done on one move is reused on the next.
+
+    Parameters
+    ----------
+    width : int (optional)
+        The number of columns of the board.
+
+    height : int (optional)
+        The number of rows of the board.
+
+    max_blanks : int (optional)
+        Positions that are not partitioned are only solved when at most this
+        many open cells remain.
+
+    max_entries : int (optional)
+        The memo tables are cleared when they grow beyond this size.
+
+    move_set : sequence<(int, int)> (optional)
+        The (row, column) offsets of the moves of the players.
+    """
+    def __init__(self, width=7, height=7, max_blanks=12, max_entries=2**20, move_set=KNIGHT):
+        self.width = width
+        self.height = height
+        self.max_blanks = max_blanks
+        self.max_entries = max_entries
+        self.geometry = move_geometry(width, height, move_set)
+        self._masks = self.geometry.masks
+        self._coords = self.geometry.coords
+        self._longest = {}
+        self._wins = {}
+        self._nodes = 0
+        self._check_time = None
+
+    def _tick(self):
+        """ Count a node and poll the clock every 1024 nodes. """
+        self._nodes += 1
+        if not self._nodes & 1023 and self._check_time is not None:
+            self._check_time()
+
+    def region(self, loc, open_mask):
+        """Return the bitmask of the open cells reachable from a cell through
+        any number of moves over open cells.
+        """
+        masks = self._masks
+        seen = 0
+        frontier = masks[loc] & open_mask
+        while frontier:
+            seen |= frontier
+            reach = 0
+            while frontier:
+                low = frontier & -frontier
+                frontier ^= low
+                reach |= masks[low.bit_length() - 1]
+            frontier = reach & open_mask & ~seen
+        return seen
+
+    def longest_path(self, loc, open_mask):
+        """Return the largest number of moves a player at `loc` can make
+        through the open cells of `open_mask` if left alone.
+        """
+        key = (loc, open_mask)
+        length = self._longest.get(key)
+        if length is not None:
+            return length
+        self._tick()
+
+        masks = self._masks
+        upper_bound = popcount(open_mask)
+        length = 0
+        moves = masks[loc] & open_mask
+        while moves and length < upper_bound:
+            low = moves & -moves
+            moves ^= low
+            length = max(length, 1 + self.longest_path(low.bit_length() - 1, open_mask ^ low))
+
+        self._longest[key] = length
+        return length
+
+    def partition(self, active, waiting, open_mask):
+        """Return the regions of the two players, or None if some open cell
+        is reachable by both.
+        """
+        active_region = self.region(active, open_mask)
+        waiting_region = self.region(waiting, open_mask)
+        if active_region & waiting_region:
+            return None
+        return active_region, waiting_region
+
+    def wins(self, active, waiting, open_mask):
+        """ Return True if the player to move at `active` wins. """
+        key = (active, waiting, open_mask)
+        result = self._wins.get(key)
+        if result is not None:
+            return result
+        self._tick()
+
+        regions = self.partition(active, waiting, open_mask)
+        if regions is not None:
+            result = (self.longest_path(active, regions[0]) >
+                      self.longest_path(waiting, regions[1]))
+        else:
+            result = False
+            moves = self._masks[active] & open_mask
+            while moves:
+                low = moves & -moves
+                moves ^= low
+                if not self.wins(waiting, low.bit_length() - 1, open_mask ^ low):
+                    result = True
+                    break
+
+        self._wins[key] = result
+        return result
+
+    def solve(self, game, check_time=None):
+        """Solve the position of a game if it is partitioned or few enough
+        open cells remain.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            The current game state; any Board or BitBoard.
+
+        check_time : callable (optional)
+            Called every 1024 nodes; it should raise an exception to abort
+            the solver when time is running out.
+
+        Returns
+        -------
+        ((int, int), bool) or None
+            The best move for the player to move and whether that player
+            wins, or None if the position is not an endgame. A losing player
+            gets the move that survives longest if the board is partitioned,
+            or the move with the most follow-up moves otherwise.
+        """
+        if game.geometry is not self.geometry:
+            return None
+        active, waiting, open_mask = position_masks(game)
+        if active is None or waiting is None:
+            return None
+        moves = self._masks[active] & open_mask
+        if not moves:
+            return None
+
+        if len(self._longest) + len(self._wins) > self.max_entries:
+            self._longest.clear()
+            self._wins.clear()
+        self._check_time = check_time
+        try:
+            return self._solve(active, waiting, open_mask, moves)
+        finally:
+            self._check_time = None
+
+    def _solve(self, active, waiting, open_mask, moves):
+        """ Solve a position for solve(), given the legal moves as a bitmask. """
+        regions = self.partition(active, waiting, open_mask)
+        if regions is not None:
+            active_region, waiting_region = regions
+            best_idx, best_length = None, -1
+            while moves:
+                low = moves & -moves
+                moves ^= low
+                idx = low.bit_length() - 1
+                length = 1 + self.longest_path(idx, active_region & ~low)
+                if length > best_length:
+                    best_idx, best_length = idx, length
+            wins = best_length > self.longest_path(waiting, waiting_region)
+            return self._coords[best_idx], wins
+
+        if popcount(open_mask) > self.max_blanks:
+            return None
+
+        best_idx, best_mobility = None, -1
+        while moves:
+            low = moves & -moves
+            moves ^= low
+            idx = low.bit_length() - 1
+            if not self.wins(waiting, idx, open_mask ^ low):
+                return self._coords[idx], True
+            mobility = popcount(self._masks[idx] & open_mask)
+            if mobility > best_mobility:
+                best_idx, best_mobility = idx, mobility
+        return self._coords[best_idx], False
@@ -0,0 +1,127 @@
+"""
+This file contains the move geometry of the isolation board: the cells a
+player can reach from each cell of a board of a given size with a given set
+of moves.
+
+The tables only depend on the board size and the move set, so they are built
+once per (width, height, move set) by `move_geometry()` and shared by every
+board, solver and agent playing on that geometry. Boards are not limited to
+7x7 knights:
+
+    Board(player_1, player_2, width=9, height=9, move_set=KING)
+
+A move set is a sequence of (row, column) offsets. Moves do not jump over or
+slide through cells, so a player can reach the cell at each offset from its
+location if that cell is on the board and open.
+"""
+
+KNIGHT = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+KING = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+# Cache of the geometries, keyed by (width, height, move set) both as given by
+# the callers and normalised
+_GEOMETRIES = {}
+
+
+def normalize_move_set(move_set):
+    """ Return a move set as a sorted tuple of distinct (row, column) offsets. """
+    return tuple(sorted(set((int(dr), int(dc)) for dr, dc in move_set)))
+
+
+class MoveGeometry(object):
+    """The precomputed move tables of a board size and move set. Use
+    `move_geometry()` to get the shared instance instead of building one.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    move_set : tuple<(int, int)>
+        The normalised (row, column) offsets of the moves.
+
+    Attributes
+    ----------
+    neighbours : list<list<int>>
+        The cell indices reachable from each cell, ignoring blocked cells, in
+        increasing order.
+
+    masks : list<int>
+        The bitmask of the cells reachable from each cell.
+
+    coords : list<(int, int)>
+        The (row, column) coordinate pair of each cell index.
+    """
+    def __init__(self, width, height, move_set):
+        self.width = width
+        self.height = height
+        self.move_set = move_set
+        self.coords = [(idx % height, idx // height) for idx in range(width * height)]
+        self.neighbours = [sorted(r + dr + (c + dc) * height for dr, dc in move_set
+                                  if 0 <= r + dr < height and 0 <= c + dc < width)
+                           for r, c in self.coords]
+        self.masks = [sum(1 << n for n in neighbours) for neighbours in self.neighbours]
+
+    def preserves(self, perm):
+        """Test whether a permutation of the cell indices maps the moves from
+        every cell onto the moves from its image, e.g., whether a symmetry of
+        the board is also a symmetry of the game.
+        """
+        masks = self.masks
+        for idx, neighbours in enumerate(self.neighbours):
+            if sum(1 << perm[n] for n in neighbours) != masks[perm[idx]]:
+                return False
+        return True
+
+    def __reduce__(self):
+        # Unpickled boards share the geometry of the receiving process
+        return move_geometry, (self.width, self.height, self.move_set)
+
+    def __repr__(self):
+        return "MoveGeometry({}, {}, {})".format(self.width, self.height, self.move_set)
+
+
+def move_geometry(width, height, move_set=KNIGHT):
+    """Return the shared move tables of a board size and move set.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    move_set : sequence<(int, int)> or MoveGeometry (optional)
+        The (row, column) offsets of the moves; knight moves by default. The
+        move set of a geometry can be given as the geometry itself, which is
+        returned as is for the same board size and spares copied boards the
+        lookup.
+
+    Returns
+    -------
+    MoveGeometry
+        The same object for every call with an equal move set.
+    """
+    if isinstance(move_set, MoveGeometry):
+        if (move_set.width, move_set.height) == (width, height):
+            return move_set
+        move_set = move_set.move_set
+    key = (width, height, move_set)
+    try:
+        return _GEOMETRIES[key]
+    except (KeyError, TypeError):
+        pass
+    normalized = normalize_move_set(move_set)
+    geometry = _GEOMETRIES.get((width, height, normalized))
+    if geometry is None:
+        geometry = MoveGeometry(width, height, normalized)
+        _GEOMETRIES[(width, height, normalized)] = geometry
+    try:
+        _GEOMETRIES[key] = geometry
+    except TypeError:
+        pass
+    return geometry
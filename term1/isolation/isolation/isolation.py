@@ -8,12 +8,24 @@ remain compatible with the defaults provided, and none of your changes will
 be available to project reviewers.
 """
 import random
-import timeit
 from copy import copy
 
+from .deadline import Deadline
+from .geometry import KNIGHT, move_geometry
+from .zobrist import zobrist_keys, hash_state
+
 TIME_LIMIT_MILLIS = 150
 
 
+def neighbour_table(width, height, move_set=KNIGHT):
+    """Return the cell indices a player can reach from each cell of a board of
+    the given size, ignoring blocked cells, in increasing order. Tables are
+    built once per board size and move set and shared by every board (see
+    `isolation.geometry`).
+    """
+    return move_geometry(width, height, move_set).neighbours
+
+
 class Board(object):
     """Implement a model for the game Isolation assuming each player moves like
     a knight in chess.
@@ -33,13 +45,26 @@ class Board(object):
 
     height : int (optional)
         The number of rows that the board should have.
+
+    random_moves : bool (optional)
+        If True (the default), get_legal_moves() returns the moves in random
+        order. If False, the moves are always returned in the same order
+        (increasing cell index, i.e., column by column), which makes searches
+        reproducible and cheaper; agents that want random move order can call
+        randomize_moves() explicitly.
+
+    move_set : sequence<(int, int)> (optional)
+        The (row, column) offsets of the moves the players can make, or a
+        `MoveGeometry`; knight moves by default (see `isolation.geometry`).
     """
     BLANK = 0
     NOT_MOVED = None
 
-    def __init__(self, player_1, player_2, width=7, height=7):
+    def __init__(self, player_1, player_2, width=7, height=7, random_moves=True,
+                 move_set=KNIGHT):
         self.width = width
         self.height = height
+        self.random_moves = random_moves
         self.move_count = 0
         self._player_1 = player_1
         self._player_2 = player_2
@@ -52,8 +77,30 @@ class Board(object):
         self._board_state[-1] = Board.NOT_MOVED
         self._board_state[-2] = Board.NOT_MOVED
 
+        # Undo stack for push_move/pop_move holding the previous location of
+        # the player that made each move
+        self._undo_stack = []
+
+        # Zobrist hash of the board state, updated incrementally by each move
+        self._zobrist = zobrist_keys(width, height)
+        self._hash = 0
+
+        # Move tables shared by every board of the same size and move set
+        self.geometry = move_geometry(width, height, move_set)
+        self._neighbours = self.geometry.neighbours
+
     def hash(self):
-        return str(self._board_state).__hash__()
+        """Return the Zobrist hash of the current game state.
+
+        The hash is maintained incrementally by `apply_move()` and
+        `pop_move()`, so this is a constant-time lookup suitable for keying a
+        transposition table.
+        """
+        return self._hash
+
+    def _rehash(self):
+        """Recompute the hash after the board state was replaced directly. """
+        self._hash = hash_state(self._board_state, self.width, self.height)
 
     @property
     def active_player(self):
@@ -92,11 +139,26 @@ class Board(object):
 
     def copy(self):
         """ Return a deep copy of the current board. """
-        new_board = Board(self._player_1, self._player_2, width=self.width, height=self.height)
+        new_board = Board(self._player_1, self._player_2, width=self.width, height=self.height,
+                          random_moves=self.random_moves, move_set=self.geometry)
         new_board.move_count = self.move_count
         new_board._active_player = self._active_player
         new_board._inactive_player = self._inactive_player
         new_board._board_state = copy(self._board_state)
+        new_board._hash = self._hash
+        return new_board
+
+    def with_players(self, player_1, player_2):
+        """Return a copy of the board with the player objects replaced, e.g.,
+        to send the position to another process without the agents.
+        """
+        new_board = self.copy()
+        new_board._player_1 = player_1
+        new_board._player_2 = player_2
+        if self._active_player == self._player_1:
+            new_board._active_player, new_board._inactive_player = player_1, player_2
+        else:
+            new_board._active_player, new_board._inactive_player = player_2, player_1
         return new_board
 
     def forecast_move(self, move):
@@ -118,6 +180,28 @@ class Board(object):
         new_board.apply_move(move)
         return new_board
 
+    def randomize_moves(self, moves, rng=random):
+        """Shuffle a list of moves in place and return it. This is the
+        randomisation hook for agents playing on boards created with
+        `random_moves=False`.
+
+        Parameters
+        ----------
+        moves : list<(int, int)>
+            A list of moves, e.g., as returned by get_legal_moves().
+
+        rng : random.Random (optional)
+            The random generator to shuffle with, so agents can use their
+            own seeded generator; defaults to the `random` module.
+
+        Returns
+        -------
+        list<(int, int)>
+            The shuffled list.
+        """
+        rng.shuffle(moves)
+        return moves
+
     def move_is_legal(self, move):
         """Test whether a move is legal in the current game state.
 
@@ -190,6 +274,110 @@ class Board(object):
             player = self.active_player
         return self.__get_moves(self.get_player_location(player))
 
+    def _location_idx(self, player):
+        """ Return the cell index of a player, or None if it has not moved. """
+        if player == self._player_1:
+            return self._board_state[-1]
+        elif player == self._player_2:
+            return self._board_state[-2]
+        raise RuntimeError(
+            "Invalid player in get_player_location: {}".format(player))
+
+    def _open_cells(self, loc):
+        """ Return the indices of the open cells reachable from a cell. """
+        state = self._board_state
+        if loc is Board.NOT_MOVED:
+            return [idx for idx in range(self.width * self.height) if not state[idx]]
+        return [idx for idx in self._neighbours[loc] if not state[idx]]
+
+    def _count_open(self, loc):
+        """ Return the number of open cells reachable from a cell. """
+        state = self._board_state
+        if loc is Board.NOT_MOVED:
+            return self.width * self.height - sum(state[:self.width * self.height])
+        count = 0
+        for idx in self._neighbours[loc]:
+            if not state[idx]:
+                count += 1
+        return count
+
+    def count_legal_moves(self, player=None):
+        """Return the number of legal moves for the specified player. This is
+        len(get_legal_moves(player)) without building or shuffling the list.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            count the legal moves for the active player on the board.
+
+        Returns
+        -------
+        int
+            The number of legal moves for the player.
+        """
+        if player is None:
+            player = self._active_player
+        return self._count_open(self._location_idx(player))
+
+    def count_common_moves(self, player, other):
+        """Return the number of cells that are legal moves for both players,
+        i.e., len(set(get_legal_moves(player)) & set(get_legal_moves(other))).
+        """
+        own_moves = self._open_cells(self._location_idx(player))
+        other_moves = self._open_cells(self._location_idx(other))
+        return len(set(own_moves).intersection(other_moves))
+
+    def forecast_mobility(self, player=None):
+        """Count the legal moves of both players after each of the legal moves
+        of the specified player, in a single pass and without copying the
+        board.
+
+        The entry for a move `m` equals
+
+            (forecast_move(m).count_legal_moves(),
+             forecast_move(m).count_legal_moves(forecast_move(m).inactive_player))
+
+        so, as with forecast_move(), the move is made by the active player
+        even when `player` is the inactive player.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            use the legal moves of the active player on the board.
+
+        Returns
+        -------
+        list<(int, int)>
+            For each legal move of the player, the number of legal moves of
+            the player to move and of the player that moved.
+        """
+        if player is None:
+            player = self._active_player
+        state = self._board_state
+        neighbours = self._neighbours
+        waiting_loc = self._location_idx(self._inactive_player)
+        if waiting_loc is Board.NOT_MOVED:
+            waiting_moves = None
+            waiting_count = self._count_open(waiting_loc)
+        else:
+            waiting_moves = set(self._open_cells(waiting_loc))
+            waiting_count = len(waiting_moves)
+
+        mobility = []
+        for idx in self._open_cells(self._location_idx(player)):
+            if waiting_moves is None or idx in waiting_moves:
+                next_count = waiting_count - 1
+            else:
+                next_count = waiting_count
+            moved_count = 0
+            for n in neighbours[idx]:
+                if not state[n]:
+                    moved_count += 1
+            mobility.append((next_count, moved_count))
+        return mobility
+
     def apply_move(self, move):
         """Move the active player to a specified location.
 
@@ -201,19 +389,66 @@ class Board(object):
         """
         idx = move[0] + move[1] * self.height
         last_move_idx = int(self.active_player == self._player_2) + 1
+        blocked, locations, side = self._zobrist
+        prev_idx = self._board_state[-last_move_idx]
+        location_keys = locations[last_move_idx - 1]
+        if prev_idx is not Board.NOT_MOVED:
+            self._hash ^= location_keys[prev_idx]
+        self._hash ^= blocked[idx] ^ location_keys[idx] ^ side
         self._board_state[-last_move_idx] = idx
         self._board_state[idx] = 1
         self._board_state[-3] ^= 1
         self._active_player, self._inactive_player = self._inactive_player, self._active_player
         self.move_count += 1
 
+    def push_move(self, move):
+        """Apply a move in place, recording what is needed to take it back
+        with `pop_move()`. This avoids the copy made by `forecast_move()`, so
+        search agents can explore the game tree on a single board.
+
+        Only moves made with push_move() can be undone; a copy of the board
+        starts with an empty undo stack.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        last_move_idx = int(self.active_player == self._player_2) + 1
+        self._undo_stack.append(self._board_state[-last_move_idx])
+        self.apply_move(move)
+
+    def pop_move(self):
+        """Undo the most recent move made with `push_move()`.
+
+        Returns
+        -------
+        (int, int)
+            The coordinate pair (row, column) of the move taken back.
+        """
+        prev_idx = self._undo_stack.pop()
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count -= 1
+        self._board_state[-3] ^= 1
+        last_move_idx = int(self.active_player == self._player_2) + 1
+        idx = self._board_state[-last_move_idx]
+        self._board_state[idx] = Board.BLANK
+        self._board_state[-last_move_idx] = prev_idx
+        blocked, locations, side = self._zobrist
+        location_keys = locations[last_move_idx - 1]
+        if prev_idx is not Board.NOT_MOVED:
+            self._hash ^= location_keys[prev_idx]
+        self._hash ^= blocked[idx] ^ location_keys[idx] ^ side
+        return (idx % self.height, idx // self.height)
+
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
-        return player == self._inactive_player and not self.get_legal_moves(self._active_player)
+        return player == self._inactive_player and not self.count_legal_moves()
 
     def is_loser(self, player):
         """ Test whether the specified player has lost the game. """
-        return player == self._active_player and not self.get_legal_moves(self._active_player)
+        return player == self._active_player and not self.count_legal_moves()
 
     def utility(self, player):
         """Returns the utility of the current game state from the perspective
@@ -237,7 +472,7 @@ class Board(object):
             a value of -inf if the player has lost, and a value of 0
             otherwise.
         """
-        if not self.get_legal_moves(self._active_player):
+        if not self.count_legal_moves():
 
             if player == self._inactive_player:
                 return float("inf")
@@ -248,18 +483,18 @@ class Board(object):
         return 0.
 
     def __get_moves(self, loc):
-        """Generate the list of possible moves for an L-shaped motion (like a
-        knight in chess).
+        """Generate the list of possible moves from a location with the move
+        set of the board (by default, an L-shaped motion like a knight in
+        chess).
         """
         if loc == Board.NOT_MOVED:
             return self.get_blank_spaces()
 
-        r, c = loc
-        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                      (1, -2), (1, 2), (2, -1), (2, 1)]
-        valid_moves = [(r + dr, c + dc) for dr, dc in directions
-                       if self.move_is_legal((r + dr, c + dc))]
-        random.shuffle(valid_moves)
+        idx = loc[0] + loc[1] * self.height
+        valid_moves = [(n % self.height, n // self.height) for n in self._neighbours[idx]
+                       if self._board_state[n] == Board.BLANK]
+        if self.random_moves:
+            random.shuffle(valid_moves)
         return valid_moves
 
     def print_board(self):
@@ -295,7 +530,7 @@ class Board(object):
 
         return out
 
-    def play(self, time_limit=TIME_LIMIT_MILLIS):
+    def play(self, time_limit=TIME_LIMIT_MILLIS, move_times=None, profiler=None):
         """Execute a match between the players by alternately soliciting them
         to select a move and applying it in the game.
 
@@ -305,38 +540,74 @@ class Board(object):
             The maximum number of milliseconds to allow before timeout
             during each turn.
 
+        move_times : list (optional)
+            If given, the milliseconds each player took to choose its move
+            are appended to it, including the last move that ended the game,
+            i.e., one more entry than the move history.
+
+        profiler : `profiler.Profiler` (optional)
+            If given, the players are given profiled boards, and the time
+            of each move and the calls made while choosing it are recorded
+            for the player to move.
+
         Returns
         ----------
         (player, list<[(int, int),]>, str)
             Return multiple including the winning player, the complete game
             move history, and a string indicating the reason for losing
             (e.g., timeout or invalid move).
+
+        Notes
+        -----
+        Players with an `observe_move(game, move)` method are shown the board
+        after every move of either player, outside of any player's clock
+        (e.g., to think on the opponent's time), and are called with `move`
+        None when the game is over. The board is this game's own, so
+        observers must copy it to change or keep it.
         """
         move_history = []
 
-        time_millis = lambda: 1000 * timeit.default_timer()
-
-        while True:
-
-            legal_player_moves = self.get_legal_moves()
-            game_copy = self.copy()
-
-            move_start = time_millis()
-            time_left = lambda : time_limit - (time_millis() - move_start)
-            curr_move = self._active_player.get_move(game_copy, time_left)
-            move_end = time_left()
-
-            if curr_move is None:
-                curr_move = Board.NOT_MOVED
-
-            if move_end < 0:
-                return self._inactive_player, move_history, "timeout"
-
-            if curr_move not in legal_player_moves:
-                if len(legal_player_moves) > 0:
-                    return self._inactive_player, move_history, "forfeit"
-                return self._inactive_player, move_history, "illegal move"
-
-            move_history.append(list(curr_move))
-
-            self.apply_move(curr_move)
+        try:
+            while True:
+
+                legal_player_moves = self.get_legal_moves()
+                game_copy = self.copy()
+                if profiler is not None:
+                    profiler.profile_board(game_copy)
+                    profiler.start_move(self._active_player)
+
+                time_left = Deadline(time_limit)
+                curr_move = self._active_player.get_move(game_copy, time_left)
+                move_end = time_left()
+                if move_times is not None:
+                    move_times.append(time_limit - move_end)
+                if profiler is not None:
+                    profiler.end_move(time_limit - move_end)
+
+                if curr_move is None:
+                    curr_move = Board.NOT_MOVED
+
+                if move_end < 0:
+                    return self._inactive_player, move_history, "timeout"
+
+                if curr_move not in legal_player_moves:
+                    if len(legal_player_moves) > 0:
+                        return self._inactive_player, move_history, "forfeit"
+                    return self._inactive_player, move_history, "illegal move"
+
+                move_history.append(list(curr_move))
+
+                self.apply_move(curr_move)
+                self._observe_move(curr_move)
+        finally:
+            self._observe_move(None)
+
+    def _observe_move(self, move):
+        """ Show a move to the players that observe the game. """
+        players = [self._player_1]
+        if self._player_2 is not self._player_1:
+            players.append(self._player_2)
+        for player in players:
+            observe_move = getattr(player, "observe_move", None)
+            if observe_move is not None:
+                observe_move(self, move)
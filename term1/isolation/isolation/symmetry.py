@@ -0,0 +1,165 @@
+"""
+This file contains the symmetries of the isolation board.
+
+Rotating or reflecting the board maps knight moves onto knight moves, so a
+position and its images under the symmetries of the board (the 8 rotations
+and reflections of a square board, or the 4 reflections of a rectangular one)
+have the same value, and their best moves are images of each other. For
+other move sets, only the symmetries that map the moves onto themselves are
+used (at least the identity). Mapping
+every position to a canonical image lets caches keyed by position (opening
+books, transposition tables) share one entry between all symmetric positions.
+
+The canonical image of a position is the one with the smallest Zobrist hash,
+ties broken by the order of the transforms, the first of which is the
+identity. Transforms are permutations of the cell indices: perm[idx] is the
+index of the cell that cell idx is mapped to.
+"""
+import struct
+
+from .bitboard import position_masks
+from .geometry import KNIGHT, move_geometry
+from .zobrist import zobrist_keys, hash_state
+
+# Cache of the transforms and of the transformed Zobrist keys for each board
+# size and move set, keyed by move geometry
+_TRANSFORMS = {}
+_KEYS = {}
+
+
+def transforms(width, height, move_set=KNIGHT):
+    """Return the symmetries of a board of the given size and move set.
+
+    Returns
+    -------
+    (list<list<int>>, list<list<int>>)
+        The cell permutation of each symmetry and its inverse.
+    """
+    key = move_geometry(width, height, move_set)
+    if key not in _TRANSFORMS:
+        maps = [lambda r, c: (r, c),
+                lambda r, c: (height - 1 - r, c),
+                lambda r, c: (r, width - 1 - c),
+                lambda r, c: (height - 1 - r, width - 1 - c)]
+        if width == height:
+            maps += [lambda r, c: (c, r),
+                     lambda r, c: (width - 1 - c, r),
+                     lambda r, c: (c, height - 1 - r),
+                     lambda r, c: (width - 1 - c, height - 1 - r)]
+        perms = []
+        inverses = []
+        for fn in maps:
+            perm = []
+            for idx in range(width * height):
+                r, c = fn(idx % height, idx // height)
+                perm.append(r + c * height)
+            if not key.preserves(perm):
+                continue
+            inverse = [0] * len(perm)
+            for idx, target in enumerate(perm):
+                inverse[target] = idx
+            perms.append(perm)
+            inverses.append(inverse)
+        _TRANSFORMS[key] = (perms, inverses)
+    return _TRANSFORMS[key]
+
+
+def transform_state(board_state, perm):
+    """ Apply a cell permutation to a board state in the Board layout. """
+    size = len(perm)
+    state = [0] * size + board_state[size:]
+    for idx in range(size):
+        state[perm[idx]] = board_state[idx]
+    for i in (-1, -2):
+        if state[i] is not None:
+            state[i] = perm[state[i]]
+    return state
+
+
+def transform_move(move, perm, height):
+    """ Apply a cell permutation to a move (row, column). """
+    idx = perm[move[0] + move[1] * height]
+    return (idx % height, idx // height)
+
+
+def canonicalize(board_state, width, height, move_set=KNIGHT):
+    """Map a board state to its canonical image under the symmetries of the
+    board.
+
+    Parameters
+    ----------
+    board_state : list
+        A game state in the list layout of `isolation.Board._board_state`.
+
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    move_set : sequence<(int, int)> (optional)
+        The (row, column) offsets of the moves of the players.
+
+    Returns
+    -------
+    (list, int)
+        The canonical board state, including the transformed locations of
+        both players, and the index of the transform that maps `board_state`
+        onto it in `transforms(width, height, move_set)[0]`.
+    """
+    perms, _ = transforms(width, height, move_set)
+    states = [transform_state(board_state, perm) for perm in perms]
+    _, t = min((hash_state(state, width, height), t) for t, state in enumerate(states))
+    return states[t], t
+
+
+def _symmetric_keys(width, height, move_set=KNIGHT):
+    """Return the Zobrist keys of the images of each cell as blocked cell,
+    player 1 location and player 2 location under all the transforms, packed
+    into one integer per cell with the key of transform t in bits
+    [64 * t, 64 * t + 64), so that one XOR updates the hashes of all images.
+    The side key is packed the same way, and the last entry unpacks a packed
+    hash into a tuple of hashes.
+    """
+    key = move_geometry(width, height, move_set)
+    if key not in _KEYS:
+        perms, _ = transforms(width, height, move_set)
+
+        def pack(keys):
+            return [sum(keys[perm[idx]] << (64 * t) for t, perm in enumerate(perms))
+                    for idx in range(width * height)]
+
+        blocked, (locations_1, locations_2), side = zobrist_keys(width, height)
+        packed_side = sum(side << (64 * t) for t in range(len(perms)))
+        unpack = struct.Struct("<{}Q".format(len(perms)))
+        _KEYS[key] = (pack(blocked), pack(locations_1), pack(locations_2), packed_side, unpack)
+    return _KEYS[key]
+
+
+def canonical_hash(game):
+    """Return the Zobrist hash of the canonical image of a game state and the
+    index of the transform that maps the game onto it.
+
+    This is equal to hashing the state returned by canonicalize(), without
+    building the transformed states.
+    """
+    width, height = game.width, game.height
+    blocked_keys, keys_1, keys_2, side, unpack = _symmetric_keys(width, height,
+                                                                 game.geometry.move_set)
+    active, waiting, open_mask = position_masks(game)
+    loc_1, loc_2 = (waiting, active) if game.move_count & 1 else (active, waiting)
+
+    packed = side if game.move_count & 1 else 0
+    blocked = ((1 << (width * height)) - 1) & ~open_mask
+    while blocked:
+        low = blocked & -blocked
+        blocked ^= low
+        packed ^= blocked_keys[low.bit_length() - 1]
+    if loc_1 is not None:
+        packed ^= keys_1[loc_1]
+    if loc_2 is not None:
+        packed ^= keys_2[loc_2]
+
+    hashes = unpack.unpack(packed.to_bytes(unpack.size, "little"))
+    value = min(hashes)
+    return value, hashes.index(value)
@@ -0,0 +1,79 @@
+"""
+This file contains the Zobrist keys used to hash isolation game states.
+
+The hash of a game state is the XOR of one key for every blocked cell, one key
+for the location of each player that has moved, and a side key when player 2
+holds the initiative. Applying or undoing a move only changes a handful of
+these terms, so the boards update their hash incrementally instead of
+rehashing the whole state.
+"""
+import random
+
+# Cache of the keys for each board size
+_KEYS = {}
+
+
+def zobrist_keys(width, height):
+    """Return the Zobrist keys for a board of the given size.
+
+    The keys are drawn from a generator seeded with the board size, so they
+    are identical across processes and runs, and hashes can be stored on
+    disk (e.g., in an opening book).
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    Returns
+    -------
+    (list<int>, (list<int>, list<int>), int)
+        The keys for each blocked cell, the keys for the location of player 1
+        and player 2 on each cell, and the side-to-move key.
+    """
+    key = (width, height)
+    if key not in _KEYS:
+        rng = random.Random("zobrist-{}x{}".format(width, height))
+        size = width * height
+        blocked = [rng.getrandbits(64) for _ in range(size)]
+        locations = ([rng.getrandbits(64) for _ in range(size)],
+                     [rng.getrandbits(64) for _ in range(size)])
+        side = rng.getrandbits(64)
+        _KEYS[key] = (blocked, locations, side)
+    return _KEYS[key]
+
+
+def hash_state(board_state, width, height):
+    """Compute the Zobrist hash of a board state from scratch.
+
+    Parameters
+    ----------
+    board_state : list
+        A game state in the list layout of `isolation.Board._board_state`.
+
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    Returns
+    -------
+    int
+        The 64-bit Zobrist hash of the state.
+    """
+    blocked, locations, side = zobrist_keys(width, height)
+    value = 0
+    for idx in range(width * height):
+        if board_state[idx]:
+            value ^= blocked[idx]
+    if board_state[-1] is not None:
+        value ^= locations[0][board_state[-1]]
+    if board_state[-2] is not None:
+        value ^= locations[1][board_state[-2]]
+    if board_state[-3]:
+        value ^= side
+    return value
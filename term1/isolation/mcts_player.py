@@ -0,0 +1,221 @@
+"""Game-playing agent that chooses moves with Monte Carlo Tree Search using the
+UCT selection rule, for comparison with the minimax-family agents in
+game_agent.py.
+
+The tree and the random playouts do not use `isolation.Board` objects at all:
+a position is three integers (the bitmask of open cells and the cells of the
+player to move and of the waiting player), moves are cell indices, and
+playouts step through the precomputed neighbour tables of the board. Each expansion
+runs a small batch of playouts and backs up their total, which amortises the
+cost of walking the tree. The subtree below the opponent's reply is kept
+between turns, so work spent on the predicted line is not lost.
+
+Nodes only refer to their children, and results are backed up along the list
+of nodes selected, so a tree has no reference cycles: subtrees that are no
+longer needed are freed at once instead of waiting for (and lengthening) a
+full garbage collection, whose pauses would otherwise land inside the search.
+"""
+import math
+import random
+
+from isolation.bitboard import position_masks
+from game_agent import IsolationPlayer
+
+# Cache of the (cell index, cell bit) neighbour lists of each move geometry
+_NEIGHBOURS = {}
+
+
+def _neighbour_bits(geometry):
+    """Return the (cell index, cell bit) pairs reachable from each cell of a
+    move geometry, and the pairs of all cells.
+    """
+    if geometry not in _NEIGHBOURS:
+        _NEIGHBOURS[geometry] = ([[(idx, 1 << idx) for idx in neighbours]
+                                  for neighbours in geometry.neighbours],
+                                 [(idx, 1 << idx) for idx in range(len(geometry.coords))])
+    return _NEIGHBOURS[geometry]
+
+
+class _Node(object):
+    """A node of the search tree. `wins` counts the playouts won by the
+    player who made `move`, i.e., the player to move at the parent node.
+    """
+    __slots__ = ("move", "children", "untried", "visits", "wins")
+
+    def __init__(self, move):
+        self.move = move
+        self.children = []
+        self.untried = None
+        self.visits = 0
+        self.wins = 0
+
+
+class MCTSPlayer(IsolationPlayer):
+    """Game-playing agent that chooses a move using Monte Carlo Tree Search.
+
+    Parameters
+    ----------
+    exploration : float (optional)
+        The exploration constant of the UCT formula.
+
+    playouts : int (optional)
+        The number of random playouts run from each newly expanded node.
+
+    timeout : float (optional)
+        Time remaining (in milliseconds) when search is aborted. The clock is
+        read after every iteration, since an iteration runs several playouts.
+
+    seed : int (optional)
+        Seed for the random generator of the playouts.
+    """
+    def __init__(self, exploration=1.4, playouts=4, timeout=10., seed=None):
+        super().__init__(timeout=timeout)
+        self.exploration = exploration
+        self.playouts = playouts
+        self.rng = random.Random(seed)
+        self._root = None
+        self._root_state = None
+
+    def get_move(self, game, time_left):
+        """Search for the best move from the available legal moves and return a
+        result before the time limit expires.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the
+            game (e.g., player locations and blocked cells).
+
+        time_left : callable
+            A function that returns the number of milliseconds left in the
+            current turn. Returning with any less than 0 ms remaining forfeits
+            the game.
+
+        Returns
+        -------
+        (int, int)
+            Board coordinates corresponding to a legal move; may return
+            (-1, -1) if there are no available legal moves.
+        """
+        self.time_left = time_left
+        self.nodes_searched = 0
+        self._coords = game.geometry.coords
+        self._neighbours, self._cells = _neighbour_bits(game.geometry)
+
+        state = position_masks(game)
+        root = self._reuse_tree(state)
+        self._root = None
+        if root is None:
+            root = _Node(None)
+        if root.untried is None:
+            root.untried = self._moves(*state)
+        if not root.untried and not root.children:
+            return (-1, -1)
+
+        while time_left() >= self.TIMER_THRESHOLD:
+            self._iterate(root, state)
+            self.nodes_searched += 1
+
+        if not root.children:
+            best = _Node(root.untried[0])
+            root.children.append(best)
+        else:
+            best = max(root.children, key=lambda child: child.visits)
+
+        # keep the subtree of the chosen move for the next turn
+        active, waiting, open_mask = state
+        self._root = best
+        self._root_state = (waiting, best.move, open_mask & ~(1 << best.move))
+        return self._coords[best.move]
+
+    def observe_move(self, game, move):
+        """ Free the tree kept for the next turn once the game is over. """
+        if move is None:
+            self._root = None
+            self._root_state = None
+
+    def _reuse_tree(self, state):
+        """Return the node of the previous tree for the current position (after
+        the opponent's reply to our last move), or None if it is not there.
+        """
+        if self._root is None:
+            return None
+        active, waiting, open_mask = state
+        _, prev_waiting, prev_open = self._root_state
+        # the opponent was to move in the saved position and moved to `waiting`
+        if (waiting is None or prev_waiting != active or
+                prev_open & ~(1 << waiting) != open_mask):
+            return None
+        for child in self._root.children:
+            if child.move == waiting:
+                return child
+        return None
+
+    def _moves(self, active, waiting, open_mask):
+        """ Return the cells the player to move can move to. """
+        cells = self._cells if active is None else self._neighbours[active]
+        return [idx for idx, bit in cells if open_mask & bit]
+
+    def _iterate(self, root, state):
+        """Run one iteration of MCTS: select a leaf with UCT, expand it, run a
+        batch of playouts and back up the result.
+        """
+        active, waiting, open_mask = state
+        node = root
+        path = [root]
+        exploration = self.exploration
+
+        # selection
+        while not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            node = max(node.children, key=lambda child: (
+                child.wins / child.visits +
+                exploration * math.sqrt(log_visits / child.visits)))
+            path.append(node)
+            open_mask &= ~(1 << node.move)
+            active, waiting = waiting, node.move
+            if node.untried is None:
+                node.untried = self._moves(active, waiting, open_mask)
+
+        # expansion
+        if node.untried:
+            move = node.untried.pop(self.rng.randrange(len(node.untried)))
+            child = _Node(move)
+            node.children.append(child)
+            node = child
+            path.append(node)
+            open_mask &= ~(1 << move)
+            active, waiting = waiting, move
+            node.untried = self._moves(active, waiting, open_mask)
+
+        # simulation: count the playouts won by the player who moved into node
+        if not node.untried and not node.children:
+            won = self.playouts
+        else:
+            won = 0
+            for _ in range(self.playouts):
+                if not self._playout(active, waiting, open_mask):
+                    won += 1
+
+        # backpropagation
+        for node in reversed(path):
+            node.visits += self.playouts
+            node.wins += won
+            won = self.playouts - won
+
+    def _playout(self, active, waiting, open_mask):
+        """Play random moves until one player is stuck, and return True if the
+        player to move at the start wins.
+        """
+        neighbours = self._neighbours
+        rand = self.rng.random
+        turn = 0
+        while True:
+            cells = self._cells if active is None else neighbours[active]
+            moves = [idx for idx, bit in cells if open_mask & bit]
+            if not moves:
+                return turn == 1
+            move = moves[int(rand() * len(moves))]
+            open_mask &= ~(1 << move)
+            active, waiting = waiting, move
+            turn ^= 1
@@ -0,0 +1,204 @@
+"""Build and query an opening book for isolation.
+
+The first plies of a game are the most expensive to search because a player
+that has not moved yet may move to any open cell, so the branching factor is
+49 and then 48 on a 7x7 board. This tool searches every position of the first
+N plies offline, with a much longer time budget than a game allows, and
+stores the best move of each position in a compact binary file. Agents then
+look the move up in constant time:
+
+    python opening_book.py --plies 3 --time 1000 --output opening_book.bin
+
+    book = OpeningBook.load("opening_book.bin")
+    player = AlphaBetaPlayer(opening_book=book)
+
+The board looks the same after any rotation or reflection that maps it onto
+itself (8 for a square board, 4 otherwise), and knight moves are preserved by
+each of them. Positions are stored under the canonical hash of
+`isolation.symmetry` (the smallest Zobrist hash among their symmetric
+images), so each family of symmetric positions is searched and stored only
+once.
+
+Each record of the file holds the 64-bit canonical hash of a position and the
+cell index of the best move in the canonical orientation, after a header with
+the board size, the number of plies covered and the number of records.
+"""
+import argparse
+import struct
+import timeit
+
+from isolation import Board
+from isolation.geometry import move_geometry
+from isolation.symmetry import transforms, canonical_hash
+from game_agent import (AlphaBetaPlayer, improved_score, custom_score,
+                        custom_score_2, custom_score_3, custom_score_4)
+
+MAGIC = b"ISOB"
+HEADER = struct.Struct("<4sBBBI")
+RECORD = struct.Struct("<QB")
+
+HEURISTICS = {fn.__name__: fn for fn in (improved_score, custom_score, custom_score_2,
+                                          custom_score_3, custom_score_4)}
+
+
+class OpeningBook(object):
+    """Best moves for the positions of the first plies of a game, keyed by
+    canonical position hash. Books are built with knight moves, so games with
+    another move set are never looked up.
+
+    Parameters
+    ----------
+    width : int (optional)
+        The number of columns of the boards the book applies to.
+
+    height : int (optional)
+        The number of rows of the boards the book applies to.
+
+    moves : dict (optional)
+        Map of canonical position hash to the cell index of the best move in
+        the canonical orientation.
+
+    plies : int (optional)
+        The number of plies from the start of the game covered by `moves`;
+        positions after that are not looked up at all.
+
+    Boards of more than 256 cells, whose cell indices do not fit the byte of
+    a record, raise ValueError.
+    """
+    def __init__(self, width=7, height=7, moves=None, plies=0):
+        if width * height > 256:
+            raise ValueError("cannot build a book for a {}x{} board: moves are stored in one "
+                             "byte".format(width, height))
+        self.width = width
+        self.height = height
+        self.moves = {} if moves is None else moves
+        self.plies = plies
+        self._geometry = move_geometry(width, height)
+        self._perms, self._inverse = transforms(width, height)
+
+    def __len__(self):
+        return len(self.moves)
+
+    def add(self, game, move):
+        """ Record the best move for the position of a game. """
+        key, t = canonical_hash(game)
+        self.moves[key] = self._perms[t][move[0] + move[1] * self.height]
+        self.plies = max(self.plies, game.move_count + 1)
+
+    def lookup(self, game):
+        """Return the book move for the position of a game.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            The current game state.
+
+        Returns
+        -------
+        (int, int) or None
+            The book move in the orientation of `game`, or None if the
+            position is not in the book.
+        """
+        if game.move_count >= self.plies or game.geometry is not self._geometry:
+            return None
+        key, t = canonical_hash(game)
+        idx = self.moves.get(key)
+        if idx is None:
+            return None
+        idx = self._inverse[t][idx]
+        return (idx % self.height, idx // self.height)
+
+    def save(self, path):
+        """ Write the book to a binary file. """
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.width, self.height, self.plies, len(self.moves)))
+            for key in sorted(self.moves):
+                f.write(RECORD.pack(key, self.moves[key]))
+
+    @classmethod
+    def load(cls, path):
+        """ Read a book written by save(). """
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, width, height, plies, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("{} is not an opening book".format(path))
+        moves = {}
+        for i in range(count):
+            key, idx = RECORD.unpack_from(data, HEADER.size + i * RECORD.size)
+            moves[key] = idx
+        return cls(width, height, moves, plies)
+
+
+def build_book(plies, time_limit, score_fn=improved_score, width=7, height=7, verbose=False):
+    """Search every position of the first `plies` plies of a game and return
+    an opening book of the best moves.
+
+    Parameters
+    ----------
+    plies : int
+        The number of plies covered by the book.
+
+    time_limit : numeric
+        Milliseconds of iterative deepening search for each position.
+
+    score_fn : callable (optional)
+        The heuristic used by the search.
+    """
+    book = OpeningBook(width, height)
+    agent = AlphaBetaPlayer(score_fn=score_fn)
+    # positions of the current ply, as move sequences from the empty board
+    frontier = [[]]
+    for ply in range(plies):
+        children = {}
+        for moves in frontier:
+            if ply % 2 == 0:
+                game = Board(agent, "Opponent", width, height, random_moves=False)
+            else:
+                game = Board("Opponent", agent, width, height, random_moves=False)
+            for move in moves:
+                game.apply_move(move)
+            if not game.get_legal_moves():
+                continue
+
+            start = timeit.default_timer()
+            time_left = lambda: time_limit - 1000 * (timeit.default_timer() - start)
+            book.add(game, agent.get_move(game, time_left))
+
+            # only one representative of each family of symmetric children
+            # needs to be searched at the next ply
+            for move in game.get_legal_moves():
+                child = game.forecast_move(move)
+                key, _ = canonical_hash(child)
+                children.setdefault(key, moves + [move])
+        if verbose:
+            print("ply {}: {} positions, {} book entries".format(ply, len(frontier), len(book)))
+        frontier = list(children.values())
+    return book
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plies", type=int, default=3,
+                        help="number of plies covered by the book (default: %(default)s)")
+    parser.add_argument("--time", type=int, default=1000,
+                        help="milliseconds of search per position (default: %(default)s)")
+    parser.add_argument("--heuristic", choices=sorted(HEURISTICS), default="improved_score",
+                        help="evaluation function of the search (default: %(default)s)")
+    parser.add_argument("--width", type=int, default=7)
+    parser.add_argument("--height", type=int, default=7)
+    parser.add_argument("--output", default="opening_book.bin",
+                        help="file to write the book to (default: %(default)s)")
+    args = parser.parse_args()
+    if args.width * args.height > 256:
+        parser.error("books only support boards of up to 256 cells")
+
+    book = build_book(args.plies, args.time, HEURISTICS[args.heuristic],
+                      args.width, args.height, verbose=True)
+    book.save(args.output)
+    print("Wrote {} positions to {}".format(len(book), args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Alpha-beta search that spreads the moves at the root of the tree over a pool
+of worker processes, so an agent can use every core during its turn.
+
+The split follows the Young Brothers Wait idea: at each iteration of
+iterative deepening, the first (eldest) root move, which move ordering makes
+the most likely best move, is searched in the agent's own process to get a
+good lower bound; the remaining moves are then searched in parallel with that
+bound. The best value found so far is kept in shared memory and read by each
+worker when it starts on a move, so later moves are searched with the
+tightest bound available and cutoffs still happen below them.
+
+Workers check a shared search generation counter while they search. The
+agent bumps it when it stops waiting for results (the search completed or
+the time ran out), which aborts any stragglers, and the workers also stop on
+their own at the deadline of the move.
+
+The pool is created on the first move and kept for the life of the agent,
+since starting processes takes longer than a whole move. Each worker keeps
+its own transposition tables between tasks.
+"""
+import multiprocessing
+import time
+
+from game_agent import AlphaBetaPlayer, SearchTimeout, custom_score, _available_cores
+from transposition import bound_type
+
+# Shared state and search agent of each worker process, set by _init_worker
+_worker = {}
+
+
+def _init_worker(generation, alpha, lock, score_fn, table_size, symmetric_table):
+    """ Set up the shared state and the search agent of a worker process. """
+    _worker["generation"] = generation
+    _worker["alpha"] = alpha
+    _worker["lock"] = lock
+    _worker["searcher"] = AlphaBetaPlayer(score_fn=score_fn, timeout=0., table_size=table_size,
+                                          endgame_blanks=0, symmetric_table=symmetric_table)
+    _worker["root"] = None
+
+
+def _search_move(board, move, depth, alpha, generation, deadline):
+    """Search a root move in a worker process.
+
+    Returns
+    -------
+    ((int, int), float or None, bool, int, int)
+        The move; its value, or None if the move is no better than the best
+        move known when its search started (the search failed low); whether
+        the search was aborted; and the nodes and cutoffs searched.
+    """
+    searcher = _worker["searcher"]
+    shared_generation = _worker["generation"]
+    shared_alpha = _worker["alpha"]
+
+    def time_left():
+        if shared_generation.value != generation:
+            return -1.
+        return 1000. * (deadline - time.monotonic())
+
+    searcher.time_left = time_left
+    searcher.nodes_searched = 0
+    searcher.cutoffs = 0
+    # start afresh on the tables and killers of a new root position, as
+    # get_move() does
+    table = searcher.tables[board.move_count & 1]
+    if _worker["root"] != board.hash():
+        _worker["root"] = board.hash()
+        table.new_search()
+        searcher._killers = {}
+    searcher._root_ply = board.move_count
+
+    alpha = max(alpha, shared_alpha.value)
+    board.push_move(move)
+    try:
+        value = searcher._min_value(board, depth - 1, alpha, float('inf'), table)
+    except SearchTimeout:
+        return move, None, True, searcher.nodes_searched, searcher.cutoffs
+    finally:
+        board.pop_move()
+
+    if value <= alpha:
+        value = None
+    else:
+        with _worker["lock"]:
+            if shared_generation.value == generation and value > shared_alpha.value:
+                shared_alpha.value = value
+    return move, value, False, searcher.nodes_searched, searcher.cutoffs
+
+
+class ParallelAlphaBetaPlayer(AlphaBetaPlayer):
+    """Game-playing agent that chooses a move using iterative deepening
+    alpha-beta search, searching the root moves of each iteration in parallel
+    over a pool of worker processes.
+
+    Call close() to shut the pool down when the agent is no longer needed.
+
+    Parameters
+    ----------
+    search_depth : int (optional)
+        See `IsolationPlayer`.
+
+    score_fn : callable (optional)
+        See `IsolationPlayer`. It must be picklable (e.g., a module level
+        function) to reach the workers.
+
+    timeout : float (optional)
+        See `IsolationPlayer`.
+
+    processes : int (optional)
+        The number of worker processes; defaults to the number of cores the
+        process may run on (its CPU affinity) when the pool starts, so an
+        agent playing in a pinned tournament worker does not oversubscribe
+        its core.
+        With a single process the agent searches like `AlphaBetaPlayer`.
+
+    split_depth : int (optional)
+        Iterations shallower than this are searched serially, since their
+        trees are too small to pay for the communication with the workers.
+
+    table_size : int (optional)
+        The number of entries in each transposition table, in the agent and
+        in each worker.
+
+    **kwargs
+        Passed on to `AlphaBetaPlayer`.
+    """
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10., processes=None,
+                 split_depth=3, table_size=2**15, **kwargs):
+        super().__init__(search_depth, score_fn, timeout, table_size, **kwargs)
+        self.processes = processes
+        self.split_depth = split_depth
+        self._table_size = table_size
+        self._pool = None
+        self._generation = None
+        self._alpha = None
+        self._lock = None
+
+    def __getstate__(self):
+        # The pool cannot be pickled; a copy of the agent starts its own
+        state = super().__getstate__()
+        state.update(_pool=None, _generation=None, _alpha=None, _lock=None)
+        return state
+
+    def _get_pool(self):
+        """ Return the worker pool, starting it on first use. """
+        if self.processes is None:
+            self.processes = _available_cores()
+        if self._pool is None and self.processes > 1:
+            self._generation = multiprocessing.RawValue('i', 0)
+            self._alpha = multiprocessing.RawValue('d', float('-inf'))
+            self._lock = multiprocessing.Lock()
+            try:
+                self._pool = multiprocessing.Pool(
+                    self.processes, initializer=_init_worker,
+                    initargs=(self._generation, self._alpha, self._lock,
+                              self.score, self._table_size, self.symmetric_table))
+            except AssertionError:
+                # daemonic processes, e.g. tournament workers, cannot have
+                # children; search serially instead
+                self.processes = 1
+        return self._pool
+
+    def close(self):
+        """ Shut down the worker pool and the ponder worker. """
+        super().close()
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf")):
+        """Search a position like `AlphaBetaPlayer.alphabeta`, searching every
+        root move but the first in the worker processes.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            An instance of the Isolation game `Board` class representing the
+            current game state
+
+        depth : int
+            Depth is an integer representing the maximum number of plies to
+            search in the game tree before aborting
+
+        alpha : float
+            Alpha limits the lower bound of search on minimizing layers
+
+        beta : float
+            Beta limits the upper bound of search on maximizing layers
+
+        Returns
+        -------
+        (int, int)
+            The board coordinates of the best move found in the current search;
+            (-1, -1) if there are no legal moves
+        """
+        pool = self._get_pool()
+        if pool is None or depth < self.split_depth:
+            return super().alphabeta(game, depth, alpha, beta)
+
+        if self.out_of_time():
+            raise SearchTimeout()
+        self.nodes_searched += 1
+
+        table = self.tables[game.move_count & 1]
+        self._root_ply = game.move_count
+        key, t = self._table_key(game)
+        moves = self._order_moves(game.get_legal_moves(), self._lookup(table, game, key, t), 0)
+        if not moves:
+            return (-1, -1)
+
+        # The eldest brother is searched first to establish a bound
+        best_move = moves[0]
+        alpha_orig = alpha
+        game.push_move(best_move)
+        try:
+            val = self._min_value(game, depth-1, alpha, beta, table)
+        finally:
+            game.pop_move()
+        alpha = max(alpha, val)
+
+        if len(moves) > 1 and val < beta:
+            values = self._split(game, moves[1:], depth, alpha)
+            for move in moves[1:]:
+                if values[move] is not None and values[move] > val:
+                    val = values[move]
+                    best_move = move
+
+        self._store(table, game, key, t, depth, val, bound_type(val, alpha_orig, beta), best_move)
+        return best_move
+
+    def _split(self, game, moves, depth, alpha):
+        """Search root moves in the worker processes with a lower bound of
+        `alpha` and return their values by move; the value is None for the
+        moves that are no better than the bound.
+        """
+        with self._lock:
+            self._generation.value += 1
+            self._alpha.value = alpha
+            generation = self._generation.value
+        deadline = time.monotonic() + (self.time_left() - self.TIMER_THRESHOLD) / 1000.
+        board = game.with_players("Player1", "Player2")
+
+        results = [self._pool.apply_async(_search_move,
+                                          (board, move, depth, alpha, generation, deadline))
+                   for move in moves]
+        values = {}
+        try:
+            for result in results:
+                while not result.ready():
+                    if self.out_of_time():
+                        raise SearchTimeout()
+                    result.wait(0.001)
+                move, value, aborted, nodes, cutoffs = result.get()
+                self.nodes_searched += nodes
+                self.cutoffs += cutoffs
+                if aborted:
+                    raise SearchTimeout()
+                values[move] = value
+        finally:
+            # stop any worker still searching for this split
+            with self._lock:
+                self._generation.value += 1
+        return values
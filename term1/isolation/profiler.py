@@ -0,0 +1,262 @@
+"""Opt-in instrumentation of games and agents, to find out where the time of
+a move goes when an agent is slow or times out:
+
+    python tournament.py --profile
+
+A `Profiler` collects, for each agent:
+
+- the number of calls and the total time of the hot board methods
+  (`get_legal_moves`, `forecast_move`, `copy`) on the boards the agent is
+  given, and of its score function;
+- the number of nodes searched by each iteration depth of its searches;
+- a histogram of the time it took to choose each move.
+
+Boards are instrumented by switching the board the agent is given to a
+subclass that times the hot methods (copies and forecasts keep the
+subclass), and agents by wrapping their score function, so nothing is added
+to the game or the search when no profiler is used.
+
+    profiler = Profiler()
+    profiler.attach(agent, "AB_Custom")
+    game.play(profiler=profiler)
+    print(profiler.summary())
+"""
+import bisect
+import textwrap
+import threading
+import timeit
+
+HOT_METHODS = ("get_legal_moves", "forecast_move", "copy")
+
+# Upper bounds in milliseconds of the buckets of the move latency histograms;
+# a last bucket counts the slower moves
+LATENCY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 150, 200, 500)
+
+
+def _plain_board(board_class, state):
+    """ Rebuild a pickled profiled board as an instance of its base class. """
+    board = board_class.__new__(board_class)
+    board.__dict__.update(state)
+    return board
+
+
+class ProfileStats(object):
+    """The measurements of one agent.
+
+    Attributes
+    ----------
+    calls : dict
+        Map of function name to number of calls.
+
+    times : dict
+        Map of function name to total seconds spent in the calls.
+
+    depth_nodes : dict
+        Map of search depth to the number of nodes searched by iterations of
+        that depth.
+
+    depth_searches : dict
+        Map of search depth to the number of iterations of that depth.
+
+    latencies : list<int>
+        The number of moves in each bucket of LATENCY_BUCKETS and slower.
+    """
+    def __init__(self):
+        self.calls = {}
+        self.times = {}
+        self.depth_nodes = {}
+        self.depth_searches = {}
+        self.latencies = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def merge(self, other):
+        """ Add the measurements of another ProfileStats to these. """
+        for name, count in other.calls.items():
+            self.calls[name] = self.calls.get(name, 0) + count
+            self.times[name] = self.times.get(name, 0.) + other.times[name]
+        for depth, nodes in other.depth_nodes.items():
+            self.depth_nodes[depth] = self.depth_nodes.get(depth, 0) + nodes
+            self.depth_searches[depth] = (self.depth_searches.get(depth, 0) +
+                                          other.depth_searches[depth])
+        self.latencies = [a + b for a, b in zip(self.latencies, other.latencies)]
+
+
+class Profiler(object):
+    """Collects the measurements of the agents of one or more games.
+
+    Measurements are attributed to the agent whose move `Board.play()` is
+    waiting for, so they are only meaningful for games played with
+    `play(profiler=...)`. Calls made by other threads or processes, e.g., an
+    agent pondering on the opponent's time, are not recorded.
+
+    Parameters
+    ----------
+    clock : callable (optional)
+        Returns the current time in seconds.
+    """
+    def __init__(self, clock=timeit.default_timer):
+        self.clock = clock
+        self.stats = {}
+        self.names = {}
+        self.current = None
+        self._thread = None
+        self._board_classes = {}
+        self._scores = {}
+
+    def name(self, player):
+        """ Return the name measurements of a player are recorded under. """
+        name = self.names.get(id(player))
+        return type(player).__name__ if name is None else name
+
+    def attach(self, player, name=None):
+        """Profile an agent: time its score function and record the depths of
+        its searches. Agents without a score function are only timed per
+        move.
+
+        Parameters
+        ----------
+        player : object
+            The agent.
+
+        name : str (optional)
+            The name to record its measurements under; its class name by
+            default.
+        """
+        if name is not None:
+            self.names[id(player)] = name
+        if id(player) in self._scores:
+            return
+        score = getattr(player, "score", None)
+        self._scores[id(player)] = score
+        if score is not None:
+            player.score = self.timed("score", score)
+        if hasattr(player, "profiler"):
+            player.profiler = self
+
+    def detach(self, player):
+        """ Undo attach(), restoring the score function of the agent. """
+        if id(player) not in self._scores:
+            return
+        score = self._scores.pop(id(player))
+        if score is not None:
+            player.score = score
+        if hasattr(player, "profiler"):
+            player.profiler = None
+
+    def start_move(self, player):
+        """ Attribute the measurements that follow to a player. """
+        name = self.name(player)
+        if name not in self.stats:
+            self.stats[name] = ProfileStats()
+        self.current = self.stats[name]
+        self._thread = threading.get_ident()
+
+    def end_move(self, elapsed):
+        """ Record the milliseconds the current player took to move. """
+        if self.current is not None:
+            self.current.latencies[bisect.bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+        self.current = None
+
+    def record(self, name, elapsed):
+        """ Record a call of a function that took `elapsed` seconds. """
+        stats = self.current
+        if stats is not None and threading.get_ident() == self._thread:
+            stats.calls[name] = stats.calls.get(name, 0) + 1
+            stats.times[name] = stats.times.get(name, 0.) + elapsed
+
+    def record_depth(self, depth, nodes):
+        """ Record a search iteration of a depth that searched `nodes` nodes. """
+        stats = self.current
+        if stats is not None and threading.get_ident() == self._thread:
+            stats.depth_nodes[depth] = stats.depth_nodes.get(depth, 0) + nodes
+            stats.depth_searches[depth] = stats.depth_searches.get(depth, 0) + 1
+
+    def timed(self, name, fn):
+        """Return a function calling `fn` and recording the call as `name`;
+        also usable as a method in a class body.
+        """
+        clock = self.clock
+        record = self.record
+
+        def call(*args, **kwargs):
+            start = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, clock() - start)
+        return call
+
+    def board_class(self, base):
+        """Return the subclass of a board class that records the calls of the
+        hot methods.
+        """
+        if base not in self._board_classes:
+            clock = self.clock
+            record = self.record
+            attrs = {name: self.timed(name, getattr(base, name))
+                     for name in HOT_METHODS if name != "copy"}
+
+            def copy(board):
+                start = clock()
+                new_board = base.copy(board)
+                new_board.__class__ = board.__class__
+                record("copy", clock() - start)
+                return new_board
+
+            def reduce(board):
+                # Pickle as the plain board class
+                return _plain_board, (base, board.__dict__.copy())
+
+            attrs.update(copy=copy, __reduce__=reduce)
+            self._board_classes[base] = type("Profiled" + base.__name__, (base,), attrs)
+        return self._board_classes[base]
+
+    def profile_board(self, board):
+        """ Switch a board to its profiled subclass and return it. """
+        if board.__class__ not in self._board_classes.values():
+            board.__class__ = self.board_class(board.__class__)
+        return board
+
+    def merge(self, stats, names=None):
+        """Add measurements, e.g., from a game played in another process.
+
+        Parameters
+        ----------
+        stats : dict
+            Map of agent name to ProfileStats, i.e., `Profiler.stats`.
+
+        names : dict (optional)
+            Map of the names in `stats` to the names to record them under.
+        """
+        for name, other in stats.items():
+            if names is not None:
+                name = names.get(name, name)
+            if name not in self.stats:
+                self.stats[name] = ProfileStats()
+            self.stats[name].merge(other)
+
+    def summary(self):
+        """Return a text report of the measurements of every agent: the calls
+        of each function, the nodes and number of iterations of each search
+        depth, and the counts of the move latency histogram.
+        """
+        lines = []
+        labels = ["<={}".format(bound) for bound in LATENCY_BUCKETS]
+        labels.append(">{}".format(LATENCY_BUCKETS[-1]))
+        for name in sorted(self.stats):
+            stats = self.stats[name]
+            lines.append("{} ({} moves)".format(name, sum(stats.latencies)))
+            lines.append("  {:<18}{:>12}{:>12}{:>10}".format("function", "calls", "total ms",
+                                                           "us/call"))
+            for fn in sorted(stats.calls, key=lambda fn: -stats.times[fn]):
+                calls, seconds = stats.calls[fn], stats.times[fn]
+                lines.append("  {:<18}{:>12}{:>12.1f}{:>10.2f}".format(
+                    fn, calls, 1000. * seconds, 1e6 * seconds / calls))
+            if stats.depth_nodes:
+                lines.append(textwrap.fill("  ".join(
+                    "{}:{}/{}".format(depth, stats.depth_nodes[depth], stats.depth_searches[depth])
+                    for depth in sorted(stats.depth_nodes)), 74,
+                    initial_indent="  depth: nodes/iterations  ", subsequent_indent=" " * 27))
+            lines.append("  move ms: " + "  ".join(
+                "{} {}".format(label, count)
+                for label, count in zip(labels, stats.latencies) if count))
+        return "\n".join(lines)
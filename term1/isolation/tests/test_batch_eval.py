@@ -0,0 +1,63 @@
+"""Unit tests for the batch evaluation of the heuristics"""
+
+import random
+import unittest
+
+import isolation
+import game_agent
+
+try:
+    import batch_eval
+except ImportError:
+    batch_eval = None
+
+
+def random_games(count, width=7, height=7, move_set=isolation.KNIGHT):
+    """Return boards at every stage of random games, from the empty board to
+    positions where the player to move is stuck.
+    """
+    games = []
+    for seed in range(count):
+        rng = random.Random(seed)
+        game = isolation.Board("Player1", "Player2", width, height, move_set=move_set)
+        games.append(game.copy())
+        while game.get_legal_moves():
+            game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+            games.append(game.copy())
+    return games
+
+
+@unittest.skipIf(batch_eval is None, "numpy is not installed")
+class BatchEvalTest(unittest.TestCase):
+    """Batch scores must equal the heuristics called on each board"""
+
+    def check_heuristics(self, width, height, move_set=isolation.KNIGHT, count=20):
+        games = random_games(count, width, height, move_set)
+        states = batch_eval.board_array(games)
+        for player in ("Player1", "Player2"):
+            seats = batch_eval.board_seats(games, [player] * len(games))
+            scores = batch_eval.evaluate(states, seats, width, height, chunk_size=100,
+                                         move_set=move_set)
+            for name in ("improved_score", "cover_opponent_moves", "look_ahead_by_one"):
+                expected = [getattr(game_agent, name)(game, player) for game in games]
+                self.assertEqual(list(scores[name]), expected, name)
+                batch_scores = getattr(batch_eval, name)(states, seats, width, height, move_set)
+                self.assertEqual(list(batch_scores), expected, name)
+
+    def test_square_board(self):
+        self.check_heuristics(7, 7)
+
+    def test_rectangular_board(self):
+        self.check_heuristics(5, 4)
+
+    def test_asymmetric_move_set(self):
+        # moves into a cell differ from moves out of it
+        self.check_heuristics(6, 5, ((1, 2), (2, 1), (-1, 0)))
+
+    def test_large_board(self):
+        # cell indices over 127
+        self.check_heuristics(12, 11, isolation.KING, count=3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,9 @@ tests to run and debug your minimax and alphabeta agents locally.  The test
 cases used by the project assistant are not public.
 """
 
+import pickle
+import random
+import time
 import unittest
 
 import isolation
@@ -25,5 +28,266 @@ class IsolationTest(unittest.TestCase):
         self.fail("Hello, World!")
 
 
+class SearchTest(unittest.TestCase):
+    """Search agents must leave the board they are given unchanged"""
+
+    def setUp(self):
+        reload(game_agent)
+
+    def check_agent(self, agent, time_limit):
+        game = isolation.Board(agent, "Opponent")
+        game.apply_move((2, 3))
+        game.apply_move((0, 5))
+        before = game.to_string()
+        move = agent.get_move(game, lambda: time_limit)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual(game.to_string(), before)
+        self.assertEqual(game.active_player, agent)
+
+    def test_minimax(self):
+        self.check_agent(game_agent.MinimaxPlayer(search_depth=2), 1000.)
+
+    def test_alphabeta_timeout(self):
+        # time_left never changes, so the search must be cut off by a timeout
+        # raised deep in the tree, which must still unwind every move
+        agent = game_agent.AlphaBetaPlayer()
+        calls = []
+
+        def time_left():
+            calls.append(None)
+            return 1000. if len(calls) < 500 else 0.
+
+        game = isolation.Board(agent, "Opponent")
+        game.apply_move((2, 3))
+        game.apply_move((0, 5))
+        before = game.to_string()
+        move = agent.get_move(game, time_left)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual(game.to_string(), before)
+
+    def test_pickle_after_game(self):
+        # the tournament pool pickles agents that may have played already
+        agent = game_agent.MinimaxPlayer(search_depth=2)
+        opponent = game_agent.MinimaxPlayer(search_depth=1)
+        isolation.Board(agent, opponent, 5, 5).play(time_limit=50)
+        self.assertIsNotNone(agent.out_of_time)
+        copy = pickle.loads(pickle.dumps(agent))
+        self.assertIsNone(copy.out_of_time)
+        self.assertEqual(copy.search_depth, 2)
+
+
+def minimax_value(game, player, depth):
+    """Plain minimax value of a position from the point of view of `player`,
+    used as a reference for the search agents.
+    """
+    moves = game.get_legal_moves()
+    if not moves:
+        return float('-inf') if game.active_player == player else float('inf')
+    if depth == 0:
+        return game_agent.improved_score(game, player)
+    values = [minimax_value(game.forecast_move(m), player, depth - 1) for m in moves]
+    return max(values) if game.active_player == player else min(values)
+
+
+def random_position(seed, num_moves):
+    """Return a board after `num_moves` random moves from a fixed seed. """
+    rng = random.Random(seed)
+    agent = game_agent.AlphaBetaPlayer(score_fn=game_agent.improved_score)
+    game = isolation.Board(agent, "Opponent")
+    for _ in range(num_moves):
+        moves = sorted(game.get_legal_moves())
+        if not moves:
+            break
+        game.apply_move(rng.choice(moves))
+    return game, agent
+
+
+class TranspositionTest(unittest.TestCase):
+    """Alpha-beta with a transposition table must find minimax-optimal moves"""
+
+    def setUp(self):
+        reload(game_agent)
+
+    def test_hash_is_incremental(self):
+        game, _ = random_position(0, 10)
+        for board_class in (isolation.Board, isolation.BitBoard):
+            board = board_class(game.active_player, game.inactive_player)
+            board._board_state = list(game._board_state)
+            board._rehash()
+            self.assertEqual(board.hash(), game.hash())
+
+    def test_hash_distinguishes_side_and_players(self):
+        game, _ = random_position(1, 2)
+        swapped = isolation.Board("Player1", "Player2")
+        swapped.apply_move(game.get_player_location(game.inactive_player))
+        swapped.apply_move(game.get_player_location(game.active_player))
+        self.assertNotEqual(swapped.hash(), game.hash())
+
+    def test_alphabeta_matches_minimax(self):
+        for seed in range(10):
+            game, agent = random_position(seed, 12 + seed % 4)
+            if not game.get_legal_moves() or game.active_player != agent:
+                continue
+            agent.time_left = lambda: 1000.
+            for depth in (1, 2, 3, 4):
+                best = minimax_value(game, agent, depth)
+                move = agent.alphabeta(game, depth)
+                value = minimax_value(game.forecast_move(move), agent, depth - 1)
+                self.assertEqual(value, best)
+
+    def test_symmetric_table(self):
+        for seed in range(10):
+            game, agent = random_position(seed, 4 + seed % 4)
+            if not game.get_legal_moves() or game.active_player != agent:
+                continue
+            agent.symmetric_table = True
+            agent.time_left = lambda: 1000.
+            for depth in (1, 2, 3):
+                best = minimax_value(game, agent, depth)
+                move = agent.alphabeta(game, depth)
+                value = minimax_value(game.forecast_move(move), agent, depth - 1)
+                self.assertEqual(value, best)
+                # the stored best move is mapped back to the orientation of game
+                table = agent.tables[game.move_count & 1]
+                self.assertEqual(agent._principal_variation(game, table, 1), [move])
+
+
+class IterativeDeepeningTest(unittest.TestCase):
+    """Iterative deepening must stop by itself once the game is settled"""
+
+    def setUp(self):
+        reload(game_agent)
+
+    def test_endgame_search_terminates(self):
+        for seed in range(10):
+            game, agent = random_position(seed, 24)
+            if not game.get_legal_moves() or game.active_player != agent:
+                continue
+            move = agent.get_move(game, lambda: 1000.)
+            self.assertIn(move, game.get_legal_moves())
+            self.assertEqual(agent.principal_variation[0], move)
+
+    def test_endgame_solver_is_skipped_after_timeout(self):
+        class SlowEndgame(object):
+            calls = 0
+
+            def solve(self, game, check_time):
+                self.calls += 1
+                raise game_agent.SearchTimeout()
+
+        game, agent = random_position(0, 20)
+        solver = SlowEndgame()
+        agent._endgames[game.geometry] = solver
+        agent.time_left = lambda: 100.
+        self.assertIsNone(agent._solve_endgame(game))
+        self.assertIsNone(agent._solve_endgame(game))
+        self.assertEqual(solver.calls, 1)
+        # tried again once fewer cells are open, and in a new game
+        later = game.forecast_move(game.get_legal_moves()[0])
+        self.assertIsNone(agent._solve_endgame(later))
+        self.assertEqual(solver.calls, 2)
+        self.assertIsNone(agent._solve_endgame(random_position(0, 10)[0]))
+        self.assertEqual(solver.calls, 3)
+
+
+class PonderTest(unittest.TestCase):
+    """Pondering must only reuse a search of the position actually reached"""
+
+    def setUp(self):
+        reload(game_agent)
+        # ponder even on a single core
+        game_agent._available_cores = lambda: 2
+
+    def ponder_on(self, reply_index):
+        """Let the agent move and ponder for a while, then play its predicted
+        reply (reply_index None) or another legal move, and search again.
+        """
+        agent = game_agent.AlphaBetaPlayer(score_fn=game_agent.improved_score, endgame_blanks=0,
+                                           ponder=True)
+        game = isolation.Board(agent, "Opponent", random_moves=False)
+        game.apply_move((2, 3))
+        game.apply_move((0, 5))
+        move = agent.get_move(game.copy(), isolation.Deadline(50.))
+        predicted = agent.principal_variation[1]
+        game.apply_move(move)
+        before = game.to_string()
+        agent.observe_move(game, move)
+        self.assertEqual(game.to_string(), before)
+        time.sleep(0.2)
+
+        reply = predicted
+        if reply_index is not None:
+            reply = [m for m in game.get_legal_moves() if m != predicted][reply_index]
+        game.apply_move(reply)
+        agent.observe_move(game.copy(), reply)
+        self.assertIsNone(agent._ponder_task)
+        pondered = agent._ponder_result
+        move = agent.get_move(game.copy(), isolation.Deadline(15.))
+        agent.close()
+        self.assertIn(move, game.get_legal_moves())
+        self.assertIsNone(agent._ponder_result)
+        return pondered, agent, game
+
+    def test_hit(self):
+        pondered, agent, game = self.ponder_on(None)
+        self.assertEqual(pondered[0], game.hash())
+        self.assertGreaterEqual(agent.completed_depth, pondered[1])
+
+    def test_miss(self):
+        pondered, agent, game = self.ponder_on(0)
+        self.assertNotEqual(pondered[0], game.hash())
+
+    def test_table_entries(self):
+        # the search of the ponder process is copied into the agent's table
+        agent = game_agent.AlphaBetaPlayer(score_fn=game_agent.improved_score, endgame_blanks=0,
+                                           ponder=True)
+        game = isolation.Board(agent, "Opponent", random_moves=False)
+        game.apply_move((2, 3))
+        game.apply_move((0, 5))
+        move = agent.get_move(game.copy(), isolation.Deadline(50.))
+        predicted = agent.principal_variation[1]
+        game.apply_move(move)
+        agent.observe_move(game.copy(), move)
+        time.sleep(0.2)
+        game.apply_move(predicted)
+        agent.observe_move(game.copy(), predicted)
+        agent.close()
+        entry = agent.tables[game.move_count & 1].lookup(game.hash())
+        self.assertEqual(entry[0], agent._ponder_result[1])
+        self.assertEqual(entry[3], agent._ponder_result[2])
+
+    def test_play(self):
+        agent = game_agent.AlphaBetaPlayer(score_fn=game_agent.improved_score, ponder=True)
+        opponent = game_agent.AlphaBetaPlayer(score_fn=game_agent.improved_score)
+        game = isolation.Board(agent, opponent, 5, 5)
+        winner, history, termination = game.play(time_limit=50)
+        self.assertIsNone(agent._ponder_task)
+        agent.close()
+        pickle.loads(pickle.dumps(agent))
+
+
+class HeuristicTest(unittest.TestCase):
+    """The counting heuristics must match their definitions on full boards"""
+
+    def setUp(self):
+        reload(game_agent)
+
+    def test_look_ahead_by_one(self):
+        for seed in range(30):
+            game, agent = random_position(seed, seed % 25)
+            for player in (game.active_player, game.inactive_player):
+                if game.is_loser(player) or game.is_winner(player):
+                    continue
+                expected = 0.0
+                for move in game.get_legal_moves(player):
+                    s = game_agent.improved_score(game.forecast_move(move), player)
+                    if s == float('inf'):
+                        expected = s
+                        break
+                    elif s != -float('inf'):
+                        expected += s
+                self.assertEqual(game_agent.look_ahead_by_one(game, player), expected)
+
+
 if __name__ == '__main__':
     unittest.main()
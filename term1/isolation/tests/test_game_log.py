@@ -0,0 +1,79 @@
+"""Unit tests for the game log"""
+
+import os
+import random
+import tempfile
+import unittest
+
+import game_log
+import tournament
+
+from sample_players import RandomPlayer, GreedyPlayer
+
+
+class GameLogTest(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        os.remove(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def play_round(self):
+        cpu_agent = tournament.Agent(RandomPlayer(), "Random")
+        test_agents = [tournament.Agent(GreedyPlayer(), "Greedy")]
+        win_counts = {cpu_agent.player: 0, test_agents[0].player: 0}
+        with game_log.GameLog(self.path) as log:
+            tournament.play_round(cpu_agent, test_agents, win_counts, 2,
+                                  rng=random.Random(0), log=log)
+        return win_counts
+
+    def test_tournament_games(self):
+        win_counts = self.play_round()
+        records = list(game_log.read_games(self.path))
+        self.assertEqual(len(records), 4)
+        wins = {"Random": 0, "Greedy": 0}
+        for record in records:
+            wins[record.agents[record.winner]] += 1
+            self.assertEqual(record.opening, 2)
+            self.assertEqual(len(record.think_times), len(record.moves) - record.opening + 1)
+            for game, move in game_log.replay(record):
+                self.assertIn(move, game.get_legal_moves())
+            # the games are played out, so the loser is stuck
+            game.apply_move(move)
+            self.assertEqual(record.termination, "illegal move")
+            self.assertFalse(game.get_legal_moves())
+            self.assertEqual(game.inactive_player.seat, record.winner)
+        self.assertEqual(sorted(wins.values()), sorted(win_counts.values()))
+
+    def test_append_and_truncate(self):
+        self.play_round()
+        self.play_round()
+        records = list(game_log.read_games(self.path))
+        self.assertEqual(len(records), 8)
+        # the same games, up to the think times
+        games = [record._replace(think_times=None) for record in records]
+        self.assertEqual(games[:4], games[4:])
+        for record in records:
+            self.assertEqual(game_log.decode(game_log.encode(record)), record)
+
+        # a partly written record is ignored
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 3)
+        self.assertEqual(list(game_log.read_games(self.path)), records[:7])
+
+    def test_encode_limits(self):
+        record = game_log.GameRecord(("\u00e9" * 200, "AB"), 1, 7, 7, [(0, 0), (2, 1)], 2,
+                                     [1.5], 0, "timeout")
+        decoded = game_log.decode(game_log.encode(record))
+        self.assertEqual(decoded.agents, ("\u00e9" * 127, "AB"))
+        self.assertEqual(decoded.moves, record.moves)
+        with self.assertRaises(ValueError):
+            game_log.encode(record._replace(width=17, height=17))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,275 @@
+"""Unit tests for the board implementations in the isolation package."""
+
+import pickle
+import random
+import unittest
+
+import isolation
+
+from isolation import symmetry
+from isolation.zobrist import hash_state
+
+
+class BitBoardTest(unittest.TestCase):
+    """BitBoard must behave exactly like Board"""
+
+    def setUp(self):
+        self.player1 = "Player1"
+        self.player2 = "Player2"
+
+    def play_random_game(self, seed, width=7, height=7, move_set=isolation.KNIGHT):
+        """Play the same random game on a Board and a BitBoard, checking that
+        both agree on the game state after every move.
+        """
+        rng = random.Random(seed)
+        board = isolation.Board(self.player1, self.player2, width, height, move_set=move_set)
+        bitboard = isolation.BitBoard(self.player1, self.player2, width, height,
+                                      move_set=move_set)
+
+        while True:
+            self.assertEqual(bitboard._board_state, board._board_state)
+            self.assertEqual(bitboard.to_string(), board.to_string())
+            self.assertEqual(sorted(bitboard.get_blank_spaces()),
+                             sorted(board.get_blank_spaces()))
+            for player in (self.player1, self.player2):
+                self.assertEqual(bitboard.get_player_location(player),
+                                 board.get_player_location(player))
+                self.assertEqual(sorted(bitboard.get_legal_moves(player)),
+                                 sorted(board.get_legal_moves(player)))
+                self.assertEqual(bitboard.is_winner(player), board.is_winner(player))
+                self.assertEqual(bitboard.is_loser(player), board.is_loser(player))
+                self.assertEqual(bitboard.utility(player), board.utility(player))
+                other = board.get_opponent(player)
+                for b in (board, bitboard):
+                    self.assertEqual(b.count_legal_moves(player),
+                                     len(board.get_legal_moves(player)))
+                    self.assertEqual(b.count_common_moves(player, other),
+                                     len(set(board.get_legal_moves(player)) &
+                                         set(board.get_legal_moves(other))))
+                    self.assertEqual(
+                        sorted(b.forecast_mobility(player)),
+                        sorted((g.count_legal_moves(), g.count_legal_moves(g.inactive_player))
+                               for g in map(board.forecast_move, board.get_legal_moves(player))))
+
+            moves = sorted(board.get_legal_moves())
+            if not moves:
+                break
+            move = rng.choice(moves)
+            self.assertTrue(bitboard.move_is_legal(move))
+            forecast = bitboard.forecast_move(move)
+            board.apply_move(move)
+            bitboard.apply_move(move)
+            self.assertEqual(forecast._board_state, bitboard._board_state)
+            self.assertEqual(forecast.active_player, bitboard.active_player)
+
+    def test_random_games(self):
+        for seed in range(20):
+            self.play_random_game(seed)
+
+    def test_rectangular_board(self):
+        for seed in range(5):
+            self.play_random_game(seed, width=5, height=8)
+
+    def test_move_sets(self):
+        for seed in range(3):
+            self.play_random_game(seed, width=11, height=11)
+            self.play_random_game(seed, width=9, height=9, move_set=isolation.KING)
+
+    def test_copy_is_independent(self):
+        bitboard = isolation.BitBoard(self.player1, self.player2)
+        bitboard.apply_move((2, 3))
+        new_board = bitboard.copy()
+        new_board.apply_move((0, 5))
+        self.assertEqual(bitboard.get_player_location(self.player2), None)
+        self.assertEqual(new_board.get_player_location(self.player2), (0, 5))
+        self.assertEqual(bitboard.active_player, self.player2)
+
+
+class GeometryTest(unittest.TestCase):
+    """Move tables must be built once per geometry and shared"""
+
+    def test_shared_tables(self):
+        geometry = isolation.move_geometry(9, 9)
+        self.assertIs(isolation.move_geometry(9, 9, [list(m) for m in reversed(isolation.KNIGHT)]),
+                      geometry)
+        self.assertIs(pickle.loads(pickle.dumps(geometry)), geometry)
+        for board_class in (isolation.Board, isolation.BitBoard):
+            board = board_class("Player1", "Player2", 9, 9)
+            self.assertIs(board.geometry, geometry)
+            self.assertIs(board.forecast_move((4, 4)).geometry, geometry)
+            king = board_class("Player1", "Player2", 9, 9, move_set=isolation.KING)
+            self.assertIs(king.copy().geometry, isolation.move_geometry(9, 9, isolation.KING))
+
+    def test_neighbours(self):
+        geometry = isolation.move_geometry(5, 4, [(0, 1), (1, 1)])
+        self.assertEqual(geometry.neighbours[0], [0 + 1 * 4, 1 + 1 * 4])
+        self.assertEqual(geometry.masks[0], (1 << 4) | (1 << 5))
+        self.assertEqual(geometry.neighbours[3 + 4 * 4], [])
+        self.assertEqual(geometry.coords[7], (3, 1))
+
+    def test_symmetries(self):
+        # rotations and reflections do not preserve this move set
+        self.assertEqual(len(symmetry.transforms(7, 7, [(1, 2)])[0]), 1)
+        self.assertEqual(len(symmetry.transforms(7, 7, isolation.KING)[0]), 8)
+
+
+class DeterministicMovesTest(unittest.TestCase):
+    """Boards created with random_moves=False return moves in cell order"""
+
+    def test_move_order(self):
+        rng = random.Random(3)
+        board = isolation.Board("Player1", "Player2", random_moves=False)
+        bitboard = isolation.BitBoard("Player1", "Player2", random_moves=False)
+        while True:
+            moves = board.get_legal_moves()
+            self.assertEqual(moves, sorted(moves, key=lambda m: (m[1], m[0])))
+            self.assertEqual(bitboard.get_legal_moves(), moves)
+            self.assertEqual(board.copy().get_legal_moves(), moves)
+            if not moves:
+                break
+            shuffled = board.randomize_moves(list(moves), random.Random(0))
+            self.assertEqual(sorted(shuffled), sorted(moves))
+            move = rng.choice(moves)
+            board.apply_move(move)
+            bitboard.apply_move(move)
+
+
+def wins_by_search(game):
+    """ Return True if the player to move wins, by exhaustive search. """
+    for move in game.get_legal_moves():
+        if not wins_by_search(game.forecast_move(move)):
+            return True
+    return False
+
+
+class EndgameTest(unittest.TestCase):
+    """The endgame solver must agree with exhaustive search"""
+
+    def test_solve(self):
+        solver = isolation.Endgame(5, 5, max_blanks=13)
+        solved = 0
+        for seed in range(60):
+            rng = random.Random(seed)
+            game = isolation.BitBoard("Player1", "Player2", 5, 5)
+            while game.get_legal_moves() and len(game.get_blank_spaces()) > 13:
+                game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+            for board in (game, isolation.Board("Player1", "Player2", 5, 5)):
+                board._board_state = game._board_state
+                board.move_count = game.move_count
+                if board.move_count % 2:
+                    board._active_player, board._inactive_player = "Player2", "Player1"
+                result = solver.solve(board)
+                if result is None:
+                    continue
+                solved += 1
+                move, wins = result
+                self.assertIn(move, board.get_legal_moves())
+                self.assertEqual(wins, wins_by_search(board))
+                if wins:
+                    self.assertFalse(wins_by_search(board.forecast_move(move)))
+        self.assertGreater(solved, 10)
+
+
+class PushPopTest(unittest.TestCase):
+    """push_move/pop_move must restore the exact previous state"""
+
+    def check_push_pop(self, board_class):
+        rng = random.Random(0)
+        board = board_class("Player1", "Player2")
+        snapshots = []
+        moves = []
+        while True:
+            legal_moves = sorted(board.get_legal_moves())
+            if not legal_moves:
+                break
+            snapshots.append((list(board._board_state), board.move_count,
+                              board.active_player, board.inactive_player))
+            move = rng.choice(legal_moves)
+            forecast = board.forecast_move(move)
+            board.push_move(move)
+            moves.append(move)
+            self.assertEqual(board._board_state, forecast._board_state)
+
+        while snapshots:
+            self.assertEqual(board.pop_move(), moves.pop())
+            self.assertEqual((board._board_state, board.move_count,
+                              board.active_player, board.inactive_player),
+                             snapshots.pop())
+
+    def test_board(self):
+        self.check_push_pop(isolation.Board)
+
+    def test_bitboard(self):
+        self.check_push_pop(isolation.BitBoard)
+
+
+
+class SymmetryTest(unittest.TestCase):
+    """Symmetric positions must share one canonical form"""
+
+    def check_symmetry(self, width, height):
+        perms, inverses = symmetry.transforms(width, height)
+        self.assertEqual(len(perms), 8 if width == height else 4)
+        for seed in range(20):
+            rng = random.Random(seed)
+            game = isolation.BitBoard("Player1", "Player2", width, height)
+            for _ in range(rng.randint(0, 12)):
+                if not game.get_legal_moves():
+                    break
+                game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+            canonical, t = symmetry.canonicalize(game._board_state, width, height)
+            self.assertEqual(symmetry.transform_state(game._board_state, perms[t]), canonical)
+            self.assertEqual(symmetry.canonical_hash(game),
+                             (hash_state(canonical, width, height), t))
+
+            for perm, inverse in zip(perms, inverses):
+                image = isolation.Board("Player1", "Player2", width, height)
+                image._board_state = symmetry.transform_state(game._board_state, perm)
+                image.move_count = game.move_count
+                if game.move_count % 2:
+                    image._active_player, image._inactive_player = "Player2", "Player1"
+                self.assertEqual(symmetry.canonicalize(image._board_state, width, height)[0],
+                                 canonical)
+                self.assertEqual(symmetry.canonical_hash(image)[0],
+                                 hash_state(canonical, width, height))
+                # knight moves are preserved by every symmetry
+                moves = [symmetry.transform_move(m, inverse, height)
+                         for m in image.get_legal_moves()]
+                self.assertEqual(sorted(moves), sorted(game.get_legal_moves()))
+
+    def test_square_board(self):
+        self.check_symmetry(7, 7)
+
+    def test_rectangular_board(self):
+        self.check_symmetry(5, 6)
+
+
+
+class DeadlineTest(unittest.TestCase):
+    """Deadline must keep the time_left contract and poll the clock sparingly"""
+
+    def test_checker(self):
+        now = [0.]
+        reads = []
+
+        def clock():
+            reads.append(None)
+            return now[0]
+
+        deadline = isolation.Deadline(150, clock)
+        self.assertEqual(deadline(), 150.)
+        expired = deadline.checker(10., interval=4)
+        del reads[:]
+        self.assertEqual([expired() for _ in range(6)], [False] * 6)
+        self.assertEqual(len(reads), 2)
+
+        # the expiry is seen at the next read of the clock
+        now[0] = 0.141
+        self.assertAlmostEqual(deadline(), 9.)
+        self.assertEqual([expired() for _ in range(3)], [False, False, True])
+        # once expired, every call is True
+        self.assertEqual([expired() for _ in range(3)], [True] * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""Unit tests for the Monte Carlo Tree Search player"""
+
+import pickle
+import unittest
+
+import isolation
+import mcts_player
+
+
+def iteration_budget(iterations):
+    """ Return a time_left callable that expires after some calls. """
+    calls = []
+
+    def time_left():
+        calls.append(None)
+        return 1000. if len(calls) <= iterations else 0.
+    return time_left
+
+
+class MCTSPlayerTest(unittest.TestCase):
+
+    def test_legal_move(self):
+        for board_class in (isolation.Board, isolation.BitBoard):
+            agent = mcts_player.MCTSPlayer(seed=0)
+            game = board_class(agent, "Opponent")
+            game.apply_move((2, 3))
+            game.apply_move((0, 5))
+            before = game.to_string()
+            move = agent.get_move(game, iteration_budget(200))
+            self.assertIn(move, game.get_legal_moves())
+            self.assertEqual(game.to_string(), before)
+            self.assertEqual(agent.nodes_searched, 200)
+
+    def test_pickle_after_game(self):
+        agent = mcts_player.MCTSPlayer(seed=0)
+        isolation.Board(agent, mcts_player.MCTSPlayer(seed=1), 5, 5).play(time_limit=20)
+        state = agent.__getstate__()
+        self.assertIsNone(state["out_of_time"])
+        # the score function may come from a game_agent reloaded by other tests
+        del state["score"]
+        pickle.dumps(state)
+
+    def test_no_legal_moves(self):
+        agent = mcts_player.MCTSPlayer(seed=0)
+        game = isolation.Board(agent, "Opponent", 3, 3)
+        game.apply_move((1, 1))
+        game.apply_move((0, 0))
+        self.assertEqual(agent.get_move(game, iteration_budget(10)), (-1, -1))
+
+    def test_tree_is_reused(self):
+        agent = mcts_player.MCTSPlayer(seed=0)
+        game = isolation.Board(agent, "Opponent")
+        game.apply_move((2, 3))
+        game.apply_move((0, 5))
+        game.apply_move(agent.get_move(game, iteration_budget(2000)))
+        # the opponent plays the reply the tree explored most
+        best = max(agent._root.children, key=lambda child: child.visits)
+        visits = best.visits
+        self.assertGreater(visits, 0)
+        game.apply_move(agent._coords[best.move])
+        agent.get_move(game, iteration_budget(0))
+        self.assertIn(agent._root, best.children)
+        self.assertEqual(best.visits, visits)
+
+    def test_tree_is_dropped_after_game(self):
+        agent = mcts_player.MCTSPlayer(seed=0)
+        isolation.Board(agent, mcts_player.MCTSPlayer(seed=1), 5, 5).play(time_limit=20)
+        self.assertIsNone(agent._root)
+
+
+if __name__ == '__main__':
+    unittest.main()
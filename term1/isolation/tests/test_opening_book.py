@@ -0,0 +1,58 @@
+"""Unit tests for the opening book"""
+
+import os
+import tempfile
+import unittest
+
+import isolation
+import opening_book
+
+
+class OpeningBookTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.book = opening_book.build_book(plies=2, time_limit=5)
+
+    def test_covers_first_plies(self):
+        self.assertEqual(self.book.plies, 2)
+        game = isolation.Board("Player1", "Player2")
+        self.assertIn(self.book.lookup(game), game.get_legal_moves())
+        for move in game.get_legal_moves():
+            reply = self.book.lookup(game.forecast_move(move))
+            self.assertIn(reply, game.forecast_move(move).get_legal_moves())
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        self.assertIsNone(self.book.lookup(game))
+
+    def test_symmetric_positions(self):
+        # mirroring the first move mirrors the book reply
+        for move in [(0, 1), (2, 0), (1, 1)]:
+            game = isolation.Board("Player1", "Player2")
+            game.apply_move(move)
+            mirror = isolation.Board("Player1", "Player2")
+            mirror.apply_move((move[0], 6 - move[1]))
+            reply = self.book.lookup(game)
+            self.assertEqual(self.book.lookup(mirror), (reply[0], 6 - reply[1]))
+
+    def test_save_and_load(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            self.book.save(path)
+            self.assertEqual(os.path.getsize(path),
+                             opening_book.HEADER.size + len(self.book) * opening_book.RECORD.size)
+            book = opening_book.OpeningBook.load(path)
+        finally:
+            os.remove(path)
+        self.assertEqual(book.moves, self.book.moves)
+        self.assertEqual(book.plies, self.book.plies)
+
+    def test_board_size_limit(self):
+        opening_book.OpeningBook(16, 16)
+        with self.assertRaises(ValueError):
+            opening_book.OpeningBook(17, 16)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""Unit tests for the parallel alpha-beta agent"""
+
+import pickle
+import unittest
+
+import game_agent
+import parallel_search
+
+from importlib import reload
+from tests.test_game_agent import minimax_value, random_position
+
+
+class ParallelSearchTest(unittest.TestCase):
+
+    def setUp(self):
+        reload(game_agent)
+        reload(parallel_search)
+        self.agent = parallel_search.ParallelAlphaBetaPlayer(
+            score_fn=game_agent.improved_score, processes=2, split_depth=2)
+
+    def tearDown(self):
+        self.agent.close()
+
+    def test_alphabeta_matches_minimax(self):
+        for seed in range(6):
+            game, _ = random_position(seed, 12 + seed % 4)
+            if not game.get_legal_moves():
+                continue
+            game = game.with_players(self.agent, "Opponent")
+            if game.active_player != self.agent:
+                continue
+            self.agent.time_left = lambda: 1000.
+            for depth in (2, 3):
+                best = minimax_value(game, self.agent, depth)
+                move = self.agent.alphabeta(game, depth)
+                value = minimax_value(game.forecast_move(move), self.agent, depth - 1)
+                self.assertEqual(value, best)
+
+    def test_timeout(self):
+        game, _ = random_position(3, 4)
+        game = game.with_players(self.agent, "Opponent")
+        before = game.to_string()
+        calls = []
+
+        def time_left():
+            calls.append(None)
+            return 1000. if len(calls) < 300 else 0.
+
+        move = self.agent.get_move(game, time_left)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual(game.to_string(), before)
+        # the pool is kept for the next move, but not pickled
+        pool = self.agent._pool
+        self.assertIsNotNone(pool)
+        self.agent.get_move(game, lambda: 50.)
+        self.assertIs(self.agent._pool, pool)
+        self.assertIsNone(pickle.loads(pickle.dumps(self.agent))._pool)
+
+    def test_default_processes(self):
+        # the default follows the cores the process may run on, e.g. when pinned
+        parallel_search._available_cores = lambda: 1
+        agent = parallel_search.ParallelAlphaBetaPlayer(score_fn=game_agent.improved_score)
+        self.assertIsNone(agent._get_pool())
+        self.assertEqual(agent.processes, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""Unit tests for the profiler"""
+
+import pickle
+import random
+import unittest
+
+import isolation
+import profiler
+import tournament
+
+from game_agent import AlphaBetaPlayer, MinimaxPlayer, improved_score
+from sample_players import RandomPlayer, GreedyPlayer
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def test_profiled_board(self):
+        prof = profiler.Profiler()
+        for board_class in (isolation.Board, isolation.BitBoard):
+            board = prof.profile_board(board_class("Player1", "Player2"))
+            prof.start_move("Player1")
+            forecast = board.forecast_move((2, 3))
+            self.assertIs(type(forecast), type(board))
+            self.assertIsInstance(forecast, board_class)
+            forecast.get_legal_moves()
+            plain = pickle.loads(pickle.dumps(forecast))
+            self.assertIs(type(plain), board_class)
+            self.assertEqual(plain.to_string(), forecast.to_string())
+        stats = prof.stats["str"]
+        self.assertEqual(stats.calls, {"forecast_move": 2, "copy": 2, "get_legal_moves": 2})
+
+    def test_play(self):
+        prof = profiler.Profiler()
+        agent = AlphaBetaPlayer(score_fn=improved_score)
+        opponent = MinimaxPlayer(score_fn=improved_score, search_depth=2)
+        prof.attach(agent, "AB")
+        prof.attach(opponent, "MM")
+        game = isolation.Board(agent, opponent, 5, 5)
+        _, history, _ = game.play(time_limit=50, profiler=prof)
+        prof.detach(agent)
+        prof.detach(opponent)
+        self.assertIs(agent.score, improved_score)
+        self.assertIsNone(agent.profiler)
+
+        stats = prof.stats
+        self.assertEqual(sum(stats["AB"].latencies) + sum(stats["MM"].latencies),
+                         len(history) + 1)
+        for name in ("AB", "MM"):
+            self.assertGreater(stats[name].calls["score"], 0)
+            self.assertGreater(stats[name].calls["get_legal_moves"], 0)
+        self.assertEqual(set(stats["MM"].depth_nodes), {2})
+        self.assertIn(1, stats["AB"].depth_nodes)
+        self.assertIn("AB", prof.summary())
+
+    def test_tournament(self):
+        cpu_agent = tournament.Agent(RandomPlayer(), "Random")
+        test_agents = [tournament.Agent(GreedyPlayer(), "Greedy")]
+        win_counts = {cpu_agent.player: 0, test_agents[0].player: 0}
+        prof = profiler.Profiler()
+        tournament.play_round(cpu_agent, test_agents, win_counts, 2, rng=random.Random(0),
+                              profiler=prof)
+        self.assertEqual(sorted(prof.stats), ["Greedy", "Random"])
+        self.assertGreater(sum(prof.stats["Greedy"].latencies), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
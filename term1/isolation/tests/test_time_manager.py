@@ -0,0 +1,69 @@
+"""Unit tests for the time manager"""
+
+import unittest
+
+import isolation
+import game_agent
+import time_manager
+
+from importlib import reload
+
+
+class Clock(object):
+    """ A move clock that only advances when told to. """
+
+    def __init__(self, limit):
+        self.left = limit
+
+    def __call__(self):
+        return self.left
+
+
+class TimeManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.game = isolation.Board("Player1", "Player2")
+        self.game.apply_move((3, 3))
+        self.game.apply_move((0, 0))
+
+    def test_forced_move(self):
+        reload(game_agent)
+        game = isolation.Board("Player1", "Player2")
+        game.apply_move((0, 0))
+        game.apply_move((1, 2))
+        # (0, 0) can only reach (2, 1) once (1, 2) is blocked
+        agent = game_agent.AlphaBetaPlayer(time_manager=time_manager.TimeManager())
+        game = game.with_players(agent, "Opponent")
+        self.assertEqual(game.get_legal_moves(), [(2, 1)])
+        self.assertEqual(agent.get_move(game, lambda: 1000.), (2, 1))
+        self.assertEqual(agent.completed_depth, 1)
+
+    def test_predicted_cost(self):
+        manager = time_manager.TimeManager(stable_iterations=99, min_depth=1)
+        clock = Clock(150.)
+        manager.start(self.game, clock, 10.)
+        nodes = 0
+        for depth, (cost, count) in enumerate([(5., 100), (15., 300), (45., 900)], 1):
+            clock.left -= cost
+            nodes += count
+            self.assertEqual(manager.next_iteration(depth, nodes, (0, 0)), depth < 3)
+        # the node counts triple, so the next iteration should take 135 ms
+        self.assertAlmostEqual(manager.branching_factor(), 3.)
+        self.assertAlmostEqual(manager.predict(), 135.)
+
+    def test_stable_best_move(self):
+        manager = time_manager.TimeManager(stable_iterations=3, stable_fraction=0.5, min_depth=1)
+        clock = Clock(150.)
+        manager.start(self.game, clock, 10.)
+        moves = [(1, 2), (2, 1), (2, 1), (2, 1), (2, 1)]
+        results = []
+        for depth, move in enumerate(moves, 1):
+            clock.left -= 20.
+            results.append(manager.next_iteration(depth, 10 * depth, move))
+        # the move has survived 3 iterations at depth 4, with over half of
+        # the budget used
+        self.assertEqual(results, [True, True, True, False, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
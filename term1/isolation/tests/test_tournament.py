@@ -0,0 +1,46 @@
+"""Unit tests for the tournament"""
+
+import random
+import unittest
+
+import tournament
+
+from sample_players import RandomPlayer, GreedyPlayer
+
+
+class RecordingLog(object):
+    """ Keeps the records written to it instead of writing a file. """
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+
+class TournamentTest(unittest.TestCase):
+
+    def play_round(self, pool=None):
+        cpu_agent = tournament.Agent(RandomPlayer(), "Random")
+        test_agents = [tournament.Agent(GreedyPlayer(), "Greedy")]
+        win_counts = {cpu_agent.player: 0, test_agents[0].player: 0}
+        log = RecordingLog()
+        counts = tournament.play_round(cpu_agent, test_agents, win_counts, 3, pool=pool,
+                                       rng=random.Random(0), log=log)
+        wins = {agent.name: win_counts[agent.player] for agent in (cpu_agent, test_agents[0])}
+        games = [(record.agents, record.seed, record.moves, record.winner, record.termination)
+                 for record in log.records]
+        return wins, counts, games
+
+    def test_pool_plays_the_same_games(self):
+        expected = self.play_round()
+        pool = tournament.make_pool(2)
+        try:
+            self.assertEqual(self.play_round(pool), expected)
+        finally:
+            pool.close()
+            pool.join()
+        self.assertEqual(sum(expected[0].values()), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+"""Time management for the iterative deepening agents in game_agent.py.
+
+Without a time manager, iterative deepening starts iteration after iteration
+until `time_left()` runs below the agent's TIMER_THRESHOLD, and the result of
+the last, unfinished iteration is thrown away. A time manager decides after
+each completed iteration whether the next one is worth starting:
+
+- the cost of the next iteration is predicted from the time of the last one
+  and the effective branching factor (the growth of the node count from one
+  iteration to the next), and the search stops when the prediction does not
+  fit in the time left, since the iteration would be abandoned anyway;
+- the search stops early once the best move has not changed for a few
+  iterations and a good part of the budget is used, since further iterations
+  rarely change it;
+- a forced move (a single legal move) is played after the first iteration.
+
+The manager only decides between iterations: an iteration that runs past its
+prediction is still stopped by the agent's TIMER_THRESHOLD, and there is no
+budget to share out between moves, since `Board.play()` gives every move the
+same clock and time left over on one move is not carried to the next.
+
+    agent = AlphaBetaPlayer(time_manager=TimeManager())
+"""
+import math
+
+
+class TimeManager(object):
+    """Per-move time budget for an iterative deepening search.
+
+    Parameters
+    ----------
+    stable_iterations : int (optional)
+        The number of consecutive iterations the best move must survive
+        before the search may stop early.
+
+    stable_fraction : float (optional)
+        The fraction of the budget that must be used before the search stops
+        early on a stable best move.
+
+    min_depth : int (optional)
+        Always complete at least this many iterations (unless the move is
+        forced or time runs out).
+    """
+    def __init__(self, stable_iterations=3, stable_fraction=0.5, min_depth=3):
+        self.stable_iterations = stable_iterations
+        self.stable_fraction = stable_fraction
+        self.min_depth = min_depth
+        self.time_left = None
+        self.budget = 0.
+        self.reserve = 0.
+        self.forced = False
+        self._last_time = 0.
+        self._last_nodes = 0
+        self._iterations = []
+        self._stable = 0
+        self._best_move = None
+
+    def start(self, game, time_left, reserve):
+        """Start timing a move.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            The position searched.
+
+        time_left : callable
+            The clock of the move, as passed to get_move().
+
+        reserve : float
+            Milliseconds the agent keeps in hand to return its move (i.e.,
+            its TIMER_THRESHOLD).
+        """
+        self.time_left = time_left
+        self.reserve = reserve
+        self.budget = time_left() - reserve
+        self.forced = game.count_legal_moves() <= 1
+        self._last_time = 0.
+        self._last_nodes = 0
+        self._iterations = []
+        self._stable = 0
+        self._best_move = None
+
+    def branching_factor(self):
+        """Return the effective branching factor of the iterations so far, the
+        geometric mean of the node count ratios of the last two iterations,
+        or None before two iterations are done.
+        """
+        nodes = [n for n, _ in self._iterations[-3:]]
+        ratios = [b / a for a, b in zip(nodes, nodes[1:]) if a > 0]
+        if not ratios:
+            return None
+        return math.exp(sum(math.log(max(r, 1.)) for r in ratios) / len(ratios))
+
+    def predict(self):
+        """ Return the predicted milliseconds of the next iteration. """
+        ebf = self.branching_factor()
+        if ebf is None:
+            return 0.
+        return self._iterations[-1][1] * ebf
+
+    def next_iteration(self, depth, nodes, best_move):
+        """Record a completed iteration and decide whether to start the next.
+
+        Parameters
+        ----------
+        depth : int
+            The depth of the completed iteration.
+
+        nodes : int
+            The total nodes searched for this move so far.
+
+        best_move : (int, int)
+            The best move found by the iteration.
+
+        Returns
+        -------
+        bool
+            True to search the next depth, False to play `best_move`.
+        """
+        remaining = self.time_left() - self.reserve
+        elapsed = self.budget - remaining
+        self._iterations.append((nodes - self._last_nodes, elapsed - self._last_time))
+        self._last_nodes = nodes
+        self._last_time = elapsed
+
+        self._stable = self._stable + 1 if best_move == self._best_move else 1
+        self._best_move = best_move
+
+        if self.forced:
+            return False
+        if depth < self.min_depth:
+            return True
+        if (self._stable >= self.stable_iterations and
+                elapsed >= self.stable_fraction * self.budget):
+            return False
+        return self.predict() < remaining
@@ -10,18 +10,34 @@ The matches are fair because the board is initialized randomly for both
 players, and the players play each match twice -- once as the first player and
 once as the second player.  Randomizing the openings and switching the player
 order corrects for imbalances due to both starting position and initiative.
+
+Games are independent, so they can be spread over a pool of worker processes
+with the --processes option. Each game is played with its own random seed
+(drawn from --seed when given), so a tournament can be reproduced up to the
+effect of timing on the agents' searches. With --log, every game is appended
+to a binary game log (see game_log.py). Boards other than 7x7 are played
+with --width and --height. With --profile, the time spent in the hot board
+methods and score functions, the nodes searched per depth and the move
+latencies of each agent are printed at the end (see profiler.py).
 """
+import argparse
 import itertools
+import multiprocessing
+import os
 import random
 import warnings
 
 from collections import namedtuple
 
-from isolation import Board
+from game_log import GameLog, GameRecord
+from isolation import BitBoard
+from profiler import Profiler
 from sample_players import (RandomPlayer, open_move_score,
                             improved_score, center_score)
 from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
                         custom_score_2, custom_score_3, custom_score_4)
+from mcts_player import MCTSPlayer
+from time_manager import TimeManager
 
 NUM_MATCHES = 5  # number of matches against each opponent
 TIME_LIMIT = 150  # number of milliseconds before timeout
@@ -37,36 +53,135 @@ game_agent.py.
 Agent = namedtuple("Agent", ["player", "name"])
 
 
-def play_round(cpu_agent, test_agents, win_counts, num_matches):
+def play_game(players, opening, seed, width=7, height=7, profile=False):
+    """Play a single game between two players from the given opening moves on
+    a board of the given size.
+
+    With `profile`, the players are profiled for the game, under the names
+    0 and 1 for the first and second player.
+
+    The module-level random generator is seeded first, so the random choices
+    made by the board (move order) and by the players depend only on `seed`.
+
+    Returns
+    -------
+    (int, str, list<[int, int]>, list<float>, dict)
+        The index of the winner in `players`, the termination reason, the
+        moves played after the opening, the think time of each move and the
+        `Profiler.stats` of the game (None without `profile`).
+    """
+    random.seed(seed)
+    game = BitBoard(players[0], players[1], width, height)
+    for move in opening:
+        game.apply_move(move)
+    move_times = []
+    profiler = None
+    if profile:
+        profiler = Profiler()
+        for seat, player in enumerate(players):
+            profiler.attach(player, seat)
+    try:
+        winner, move_history, termination = game.play(time_limit=TIME_LIMIT,
+                                                       move_times=move_times, profiler=profiler)
+    finally:
+        if profiler is not None:
+            for player in players:
+                profiler.detach(player)
+    stats = None if profiler is None else profiler.stats
+    return int(winner is players[1]), termination, move_history, move_times, stats
+
+
+def _play_game(args):
+    """ Unpack the arguments of play_game() for Pool.imap(). """
+    return play_game(*args)
+
+
+def _init_worker(counter):
+    """Pin each worker process of the pool to its own core, so that two games
+    never compete for the same core while their moves are being timed.
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return
+    with counter.get_lock():
+        worker_id = counter.value
+        counter.value += 1
+    cores = sorted(os.sched_getaffinity(0))
+    os.sched_setaffinity(0, {cores[worker_id % len(cores)]})
+
+
+def available_cores():
+    """ Return the number of cores this process may run on. """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return multiprocessing.cpu_count()
+
+
+def make_pool(processes):
+    """Create a pool of worker processes for play_round(), limited to one
+    worker per available core.
+    """
+    processes = min(processes, available_cores())
+    counter = multiprocessing.Value("i", 0)
+    return multiprocessing.Pool(processes, initializer=_init_worker, initargs=(counter,))
+
+
+def play_round(cpu_agent, test_agents, win_counts, num_matches, pool=None, rng=random,
+               log=None, width=7, height=7, profiler=None):
     """Compare the test agents to the cpu agent in "fair" matches.
 
     "Fair" matches use random starting locations and force the agents to
     play as both first and second player to control for advantages resulting
     from choosing better opening moves or having first initiative to move.
+
+    Games are played in the worker processes of `pool` when one is given, or
+    sequentially in this process otherwise. Openings and per-game seeds are
+    drawn from `rng` either way, so both modes play the same games. Each game
+    is written to the `GameLog` `log` when one is given. Games are played on
+    boards of `width` columns and `height` rows. The agents of every game are
+    profiled into `profiler` when one is given.
     """
     timeout_count = 0
     forfeit_count = 0
+    games = []
+    names = []
     for _ in range(num_matches):
 
-        games = sum([[Board(cpu_agent.player, agent.player),
-                      Board(agent.player, cpu_agent.player)]
-                    for agent in test_agents], [])
-
         # initialize all games with a random move and response
+        board = BitBoard(cpu_agent.player, test_agents[0].player, width, height)
+        opening = []
         for _ in range(2):
-            move = random.choice(games[0].get_legal_moves())
-            for game in games:
-                game.apply_move(move)
-
-        # play all games and tally the results
-        for game in games:
-            winner, _, termination = game.play(time_limit=TIME_LIMIT)
-            win_counts[winner] += 1
-
-            if termination == "timeout":
-                timeout_count += 1
-            elif termination == "forfeit":
-                forfeit_count += 1
+            move = rng.choice(sorted(board.get_legal_moves()))
+            board.apply_move(move)
+            opening.append(move)
+
+        for agent in test_agents:
+            games.append(((cpu_agent.player, agent.player), opening, rng.getrandbits(32),
+                          width, height, profiler is not None))
+            names.append((cpu_agent.name, agent.name))
+            games.append(((agent.player, cpu_agent.player), opening, rng.getrandbits(32),
+                          width, height, profiler is not None))
+            names.append((agent.name, cpu_agent.name))
+
+    if pool is None:
+        results = map(_play_game, games)
+    else:
+        results = pool.imap(_play_game, games)
+
+    # tally the results
+    for (players, opening, seed, _, _, _), agents, result in zip(games, names, results):
+        winner, termination, move_history, move_times, stats = result
+        win_counts[players[winner]] += 1
+        if profiler is not None:
+            profiler.merge(stats, {0: agents[0], 1: agents[1]})
+        if log is not None:
+            moves = opening + [tuple(move) for move in move_history]
+            log.write(GameRecord(agents, seed, width, height, moves, len(opening),
+                                 move_times, winner, termination))
+
+        if termination == "timeout":
+            timeout_count += 1
+        elif termination == "forfeit":
+            forfeit_count += 1
 
     return timeout_count, forfeit_count
 
@@ -77,8 +192,35 @@ def update(total_wins, wins):
     return total_wins
 
 
-def play_matches(cpu_agents, test_agents, num_matches):
-    """Play matches between the test agent and each cpu_agent individually. """
+def play_matches(cpu_agents, test_agents, num_matches, processes=1, seed=None, log_path=None,
+                 width=7, height=7, profile=False):
+    """Play matches between the test agent and each cpu_agent individually.
+
+    Parameters
+    ----------
+    processes : int (optional)
+        The number of worker processes to play games in; 1 plays every game
+        in this process.
+
+    seed : int (optional)
+        Seed for the openings and per-game seeds of the tournament.
+
+    log_path : str (optional)
+        Append every game to the game log at this path.
+
+    width : int (optional)
+        The number of columns of the boards.
+
+    height : int (optional)
+        The number of rows of the boards.
+
+    profile : bool (optional)
+        Profile the agents and print a summary of each at the end.
+    """
+    rng = random.Random(seed)
+    profiler = Profiler() if profile else None
+    pool = make_pool(processes) if processes > 1 else None
+    log = GameLog(log_path) if log_path is not None else None
     total_wins = {agent.player: 0 for agent in test_agents}
     total_timeouts = 0.
     total_forfeits = 0.
@@ -93,7 +235,8 @@ def play_matches(cpu_agents, test_agents, num_matches):
 
         print("{!s:^9}{:^13}".format(idx + 1, agent.name), end="", flush=True)
 
-        counts = play_round(agent, test_agents, wins, num_matches)
+        counts = play_round(agent, test_agents, wins, num_matches, pool, rng, log,
+                            width, height, profiler)
         total_timeouts += counts[0]
         total_forfeits += counts[1]
         total_wins = update(total_wins, wins)
@@ -106,6 +249,12 @@ def play_matches(cpu_agents, test_agents, num_matches):
             ) for i in range(0, len(round_totals), 2)
         ]))
 
+    if pool is not None:
+        pool.close()
+        pool.join()
+    if log is not None:
+        log.close()
+
     print("-" * 74)
     print('{:^9}{:^13}'.format("", "Win Rate:") +
         ''.join([
@@ -122,9 +271,31 @@ def play_matches(cpu_agents, test_agents, num_matches):
     if total_forfeits:
         print(("\nYour agents forfeited {} games while there were still " +
                "legal moves available to play.\n").format(total_forfeits))
+    if profiler is not None:
+        print("\nProfile\n" + profiler.summary())
 
 
 def main():
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument("-p", "--processes", type=int, default=1,
+                        help="number of games to play in parallel, at most "
+                             "one per core (default: 1)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed to reproduce the openings and per-game "
+                             "random choices of a tournament")
+    parser.add_argument("--log", metavar="FILE", default=None,
+                        help="append every game to this binary game log")
+    parser.add_argument("--width", type=int, default=7,
+                        help="number of columns of the board (default: 7)")
+    parser.add_argument("--height", type=int, default=7,
+                        help="number of rows of the board (default: 7)")
+    parser.add_argument("--profile", action="store_true",
+                        help="print the time spent in the hot functions, the "
+                             "nodes per search depth and the move latencies "
+                             "of each agent")
+    args = parser.parse_args()
+    if args.log is not None and args.width * args.height > 256:
+        parser.error("--log only supports boards of up to 256 cells")
 
     # Define two agents to compare -- these agents will play from the same
     # starting position against the same adversaries in the tournament
@@ -133,7 +304,9 @@ def main():
         Agent(AlphaBetaPlayer(score_fn=custom_score), "AB_Custom"),
         Agent(AlphaBetaPlayer(score_fn=custom_score_2), "AB_Custom_2"),
         Agent(AlphaBetaPlayer(score_fn=custom_score_3), "AB_Custom_3"),
-        Agent(AlphaBetaPlayer(score_fn=custom_score_4), "AB_Custom_4")
+        Agent(AlphaBetaPlayer(score_fn=custom_score_4), "AB_Custom_4"),
+        Agent(AlphaBetaPlayer(score_fn=custom_score, time_manager=TimeManager()), "AB_Custom_TM"),
+        Agent(MCTSPlayer(), "MCTS")
     ]
 
     # Define a collection of agents to compete against the test agents
@@ -151,7 +324,8 @@ def main():
     print("{:^74}".format("*************************"))
     print("{:^74}".format("Playing Matches"))
     print("{:^74}".format("*************************"))
-    play_matches(cpu_agents, test_agents, NUM_MATCHES)
+    play_matches(cpu_agents, test_agents, NUM_MATCHES, args.processes, args.seed, args.log,
+                 args.width, args.height, args.profile)
 
 
 if __name__ == "__main__":
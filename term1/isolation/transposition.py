@@ -0,0 +1,106 @@
+"""This file contains a bounded transposition table for the search agents in
+game_agent.py.
+
+Entries are keyed by the Zobrist hash returned by `isolation.Board.hash()`
+and record the result of searching a position to a given depth: the value,
+whether that value is exact or only a lower/upper bound (after an alpha-beta
+cutoff), and the best move found. The best move is also what lets iterative
+deepening search the previous iteration's choice first.
+"""
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+def bound_type(value, alpha, beta):
+    """Classify a fail-soft alpha-beta result searched with window
+    (alpha, beta) as an EXACT value, a LOWER bound or an UPPER bound.
+    """
+    if value <= alpha:
+        return UPPER
+    if value >= beta:
+        return LOWER
+    return EXACT
+
+
+class TranspositionTable(object):
+    """Fixed-size hash table of search results with depth-preferred
+    replacement.
+
+    Each position hashes to a single slot. A slot holding an entry from the
+    current search is only overwritten by a result searched at least as deep,
+    while entries left over from earlier searches are always replaced, so
+    stale shallow results cannot crowd out the current search.
+
+    Parameters
+    ----------
+    size : int (optional)
+        The number of slots in the table.
+    """
+    def __init__(self, size=2**15):
+        self.size = size
+        self.generation = 0
+        self._slots = [None] * size
+
+    def new_search(self):
+        """Mark the start of a new search; entries stored so far become
+        candidates for replacement.
+        """
+        self.generation += 1
+
+    def clear(self):
+        """ Remove all entries from the table. """
+        self._slots = [None] * self.size
+
+    def entries(self):
+        """Return the (key, depth, value, bound type, best move) of every
+        entry stored since the last call to new_search(), e.g., to copy the
+        results of a search into the table of another process.
+        """
+        generation = self.generation
+        return [slot[:5] for slot in self._slots if slot is not None and slot[5] == generation]
+
+    def lookup(self, key):
+        """Return the entry stored for a position.
+
+        Parameters
+        ----------
+        key : int
+            The Zobrist hash of the position.
+
+        Returns
+        -------
+        (int, float, int, (int, int)) or None
+            The (depth, value, bound type, best move) recorded for the
+            position, or None if the position is not in the table.
+        """
+        slot = self._slots[key % self.size]
+        if slot is not None and slot[0] == key:
+            return slot[1:5]
+        return None
+
+    def store(self, key, depth, value, flag, move):
+        """Record the result of searching a position.
+
+        Parameters
+        ----------
+        key : int
+            The Zobrist hash of the position.
+
+        depth : int
+            The number of plies the position was searched to.
+
+        value : float
+            The value returned by the search.
+
+        flag : int
+            One of EXACT, LOWER or UPPER.
+
+        move : (int, int)
+            The best move found, or None.
+        """
+        idx = key % self.size
+        slot = self._slots[idx]
+        if slot is None or slot[5] != self.generation or depth >= slot[1]:
+            self._slots[idx] = (key, depth, value, flag, move, self.generation)
@@ -0,0 +1,197 @@
+"""Compare the time and memory of the sudoku search strategies on generated
+hard diagonal sudokus:
+
+    python benchmark.py --count 20 --seed 0
+
+The puzzles are minimal: the givens of a random solved diagonal grid are
+removed in random order as long as the solution stays unique, which leaves
+grids that propagation alone cannot solve. Each puzzle is solved by
+
+- copy: the mask search, copying the mask list for each branch, as
+  search_masks() did before it kept a trail;
+- trail: search_masks(), changing one mask list and undoing failed branches.
+
+The time is measured without instrumentation. The puzzles are then solved
+again under tracemalloc, which gives the peak memory of each solve and the
+memory allocated by each operation on the state of the search: the board
+copied for each branch by the copy search, and each append to the trail of
+the trail search, which allocates a block when the trail outgrows the ones
+it has (blocks freed by undoing a branch are kept for reuse). Propagation
+allocates the same temporaries in both, so these are the allocations that
+differ.
+"""
+import argparse
+import collections
+import gc
+import random
+import timeit
+import tracemalloc
+
+import solution
+from solution import mask_counts
+
+# The symmetries of the square, which map the two diagonals onto themselves
+SYMMETRIES = [
+    lambda r, c: (r, c),
+    lambda r, c: (c, 8 - r),
+    lambda r, c: (8 - r, 8 - c),
+    lambda r, c: (8 - c, r),
+    lambda r, c: (c, r),
+    lambda r, c: (8 - c, 8 - r),
+    lambda r, c: (r, 8 - c),
+    lambda r, c: (8 - r, c),
+]
+
+
+def random_solution(rng):
+    """ Return a random solved diagonal grid as a string. """
+    base = solution.solve('.' * 81)
+    digits = list('123456789')
+    rng.shuffle(digits)
+    relabel = dict(zip('123456789', digits))
+    symmetry = rng.choice(SYMMETRIES)
+    grid = [None] * 81
+    for idx, s in enumerate(solution.boxes):
+        r, c = symmetry(idx // 9, idx % 9)
+        grid[r * 9 + c] = relabel[base[s]]
+    return ''.join(grid)
+
+
+def make_puzzle(rng):
+    """ Return a minimal diagonal sudoku with a unique solution. """
+    grid = list(random_solution(rng))
+    order = list(range(81))
+    rng.shuffle(order)
+    for idx in order:
+        given, grid[idx] = grid[idx], '.'
+        if solution.count_solutions(solution.grid_masks(''.join(grid))) != 1:
+            grid[idx] = given
+    return ''.join(grid)
+
+
+class AllocationCounter(object):
+    """ Counts the operations that allocate memory, while tracemalloc is tracing. """
+    def __init__(self):
+        self.allocations = 0
+        self.allocated = 0
+        # The traced memory at the start of the operation is kept here, so
+        # that storing it frees the last one and the count stays unchanged
+        self._start = 1 << 40
+
+    def start(self):
+        self._start = tracemalloc.get_traced_memory()[0]
+
+    def stop(self):
+        grown = tracemalloc.get_traced_memory()[0] - self._start
+        if grown > 0:
+            self.allocations += 1
+            self.allocated += grown
+
+
+class CountingTrail(collections.deque):
+    """ A trail that counts the appends that allocate memory. """
+    def __init__(self, counter):
+        super().__init__()
+        self.counter = counter
+
+    def append(self, item):
+        self.counter.start()
+        collections.deque.append(self, item)
+        self.counter.stop()
+
+
+def branch(masks, s, bit, counter=None):
+    """ Return a copy of the masks with box s set to bit, counting the copy with counter if given. """
+    if counter is not None:
+        counter.start()
+    new_sudoku = masks[:]
+    if counter is not None:
+        counter.stop()
+    new_sudoku[s] = bit
+    return new_sudoku
+
+
+def copy_search(masks, counter=None, dirty=None):
+    """search_masks() with a copy of the board for each branch, counting the
+    copies with counter if given.
+    """
+    if dirty is None:
+        dirty = [True] * len(solution.unit_indices)
+    masks = solution.propagate(masks, dirty=dirty)
+    if masks is False:
+        return False
+    if all(mask_counts[m] == 1 for m in masks):
+        return masks
+    n, s = min((mask_counts[m], i) for i, m in enumerate(masks) if mask_counts[m] > 1)
+    candidates = masks[s]
+    while candidates:
+        bit = candidates & -candidates
+        candidates ^= bit
+        attempt = copy_search(branch(masks, s, bit, counter), counter,
+                              solution.branch_dirty(dirty, s))
+        if attempt:
+            return attempt
+    return False
+
+
+def trail_search(masks, counter=None):
+    """search_masks(), counting the appends to its trail with counter if
+    given.
+    """
+    if counter is None:
+        return solution.search_masks(masks)
+    return solution.search_masks(masks, CountingTrail(counter))
+
+
+SOLVERS = [
+    ("copy", copy_search),
+    ("trail", trail_search),
+]
+
+
+def measure(search, grids):
+    """Solve every grid, returning the total seconds, the allocations and
+    allocated bytes of the search state, and the peak traced bytes of each
+    solve.
+    """
+    start = timeit.default_timer()
+    for grid in grids:
+        search(solution.grid_masks(grid))
+    elapsed = timeit.default_timer() - start
+
+    # Collections would free memory in the middle of the counted operations
+    gc.disable()
+    counter = AllocationCounter()
+    peaks = []
+    for grid in grids:
+        masks = solution.grid_masks(grid)
+        tracemalloc.start()
+        search(masks, counter)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    gc.enable()
+    return elapsed, counter.allocations, counter.allocated, peaks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=20, help="number of puzzles")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the puzzle generator")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    grids = [make_puzzle(rng) for _ in range(args.count)]
+    givens = sum(81 - grid.count('.') for grid in grids) / float(len(grids))
+    print("{} puzzles, {:.1f} givens on average".format(len(grids), givens))
+
+    print("{:<8}{:>12}{:>16}{:>18}{:>16}".format("solver", "ms/puzzle", "allocs/puzzle",
+                                              "alloc KiB/puzzle", "mean peak KiB"))
+    for name, search in SOLVERS:
+        elapsed, allocations, allocated, peaks = measure(search, grids)
+        print("{:<8}{:>12.2f}{:>16.1f}{:>18.1f}{:>16.1f}".format(
+            name, 1000. * elapsed / len(grids), allocations / float(len(grids)),
+            allocated / 1024. / len(grids), sum(peaks) / 1024. / len(peaks)))
+
+
+if __name__ == "__main__":
+    main()
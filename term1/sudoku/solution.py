@@ -1,4 +1,9 @@
+import collections
 import itertools
+import multiprocessing
+import os
+import sys
+import timeit
 
 rows = 'ABCDEFGHI'
 cols = '123456789'
@@ -16,16 +21,13 @@ units = dict((s, [u for u in unitlist if s in u]) for s in boxes)
 peers = dict((s, set(sum(units[s], []))-set([s])) for s in boxes)
 
 
-assignments = []
-
 def assign_value(values, box, value):
     """
     Please use this function to update your values dictionary!
-    Assigns a value to a given box. If it updates the board record it.
+    Assigns a value to a given box. Boards are recorded for visualize.py by
+    passing an AssignmentRecorder to solve().
     """
     values[box] = value
-    if len(value) == 1:
-        assignments.append(values.copy())
     return values
 
 def grid_values(grid):
@@ -197,23 +199,503 @@ def search(values):
             return attempt
 
 
-def solve(grid):
+# Bitmask solver core
+#
+# The functions above keep the candidates of each box as a string of digits in
+# a dict, so every strategy is string replace() and `in` checks over 81 boxes.
+# The core below keeps them as 9-bit integer masks (bit d - 1 set when digit d
+# is a candidate) in a flat list of 81 slots, in the order of `boxes`, and
+# walks precomputed index tables instead of box names. Propagation reaches
+# the same board as reduce_puzzle() (see propagate()), and the search
+# branches like search(): on the first box with the fewest candidates, trying
+# the digits in increasing order, so both find the same solution. The search
+# keeps a single board and undoes failed branches from a trail of the changes
+# instead of copying the board at each branch.
+
+ALL_DIGITS = 0x1FF
+box_index = dict((s, i) for i, s in enumerate(boxes))
+unit_indices = [[box_index[s] for s in unit] for unit in unitlist]
+peer_indices = [sorted(box_index[p] for p in peers[s]) for s in boxes]
+box_units = [[u for u, unit in enumerate(unit_indices) if i in unit] for i in range(len(boxes))]
+digit_masks = dict((d, 1 << i) for i, d in enumerate('123456789'))
+mask_digits = [''.join(d for d in '123456789' if m & digit_masks[d]) for m in range(ALL_DIGITS + 1)]
+mask_counts = [len(digits) for digits in mask_digits]
+
+
+def grid_masks(grid):
+    """
+    Convert grid into a list of candidate masks, ALL_DIGITS for empties.
+    Args:
+        grid(string) - A grid in string form.
+    Returns:
+        A list of the 81 candidate masks in the order of `boxes`.
+    """
+    values = grid_values(grid)
+    return [digit_masks.get(values[s], ALL_DIGITS) for s in boxes]
+
+
+def mask_values(masks):
+    """
+    Convert a list of candidate masks into the dictionary form of the sudoku.
+    """
+    return dict((s, mask_digits[m]) for s, m in zip(boxes, masks))
+
+
+class AssignmentRecorder(object):
+    """
+    Records the boards of a solve() for visualize.py, from the changes the mask solver makes.
+    Iterating over a recorder yields a snapshot of the board after each change that leaves a
+    box with a single digit, including the changes undone by the search. Only the boxes that
+    changed since the previous snapshot are stored.
+    Attributes:
+        diffs(list): the (box index, mask) pairs changed at each snapshot.
+    """
+    def __init__(self):
+        self.diffs = []
+        self._pending = {}
+
+    def start(self, masks):
+        """
+        Record the board a search starts from.
+        """
+        self._pending = dict(enumerate(masks))
+
+    def record(self, i, mask):
+        """
+        Record a change of the mask of box i.
+        """
+        self._pending[i] = mask
+        if mask_counts[mask] == 1:
+            self.diffs.append(tuple(self._pending.items()))
+            self._pending.clear()
+
+    def record_trail(self, masks, trail, mark):
+        """
+        Record the changes on a trail after its first `mark` entries, in order, given the masks
+        they led to.
+        """
+        # The trail holds the mask of each box before a change; the mask after
+        # it is the one before the next change of the box, or its current mask
+        changes = []
+        after = {}
+        for k in range(len(trail) - 2, mark - 2, -2):
+            i = trail[k]
+            changes.append((i, after.get(i, masks[i])))
+            after[i] = trail[k + 1]
+        for i, mask in reversed(changes):
+            self.record(i, mask)
+
+    def __len__(self):
+        return len(self.diffs)
+
+    def __iter__(self):
+        values = {}
+        for diff in self.diffs:
+            for i, mask in diff:
+                values[boxes[i]] = mask_digits[mask]
+            yield values.copy()
+
+
+def _unit_singles(masks, unit):
+    """
+    Return the mask of the digits that fit in a single unsolved box of a unit, or False if a digit
+    fits in none.
+    """
+    seen = twice = solved = 0
+    for i in unit:
+        m = masks[i]
+        twice |= seen & m
+        seen |= m
+        if mask_counts[m] == 1:
+            solved |= m
+    if seen != ALL_DIGITS:
+        return False
+    return seen & ~twice & ~solved
+
+
+def propagate(masks, trail=None, dirty=None):
+    """
+    Apply eliminate, only choice and naked twins in passes, like reduce_puzzle(), until a pass solves no
+    new box, and leave the board in the same state as reduce_puzzle() would.
+
+    Each pass makes the same changes in the same order as reduce_puzzle(), but skips what cannot change
+    anything: later passes only eliminate the values of boxes solved since, and only check the units
+    holding a box whose candidates changed since the unit was last checked. The first pass checks the
+    whole board, unless `dirty` tells which units changed since the board last stalled. Contradictions,
+    a box without candidates or a digit without a box in a unit, end the propagation at once.
+    Args:
+        masks(list): the candidate masks, updated in place.
+        trail(collections.deque): if given, the index and previous mask of every box changed are
+            appended to it, so that undo() can restore the board.
+        dirty(list): if given, a flag for each unit of `unitlist`, set for the units that may have
+            changed since a propagation of the board stalled; the other units are not checked in
+            the first pass. When the board stalls again, the flags are set for the units left to
+            check, to pass on after the next change.
+    Returns:
+        The masks, or False if the board has no solution.
+    """
+    if dirty is None:
+        choice_dirty = [True] * len(unit_indices)
+        solved = [i for i, m in enumerate(masks) if mask_counts[m] == 1]
+    else:
+        choice_dirty = dirty[:]
+        # The boxes solved when the board stalled had their values eliminated
+        solved = list(set(i for u, unit in enumerate(unit_indices) if dirty[u]
+                          for i in unit if mask_counts[masks[i]] == 1))
+    twins_dirty = choice_dirty[:]
+
+    def change(i, new_mask):
+        if trail is not None:
+            trail.append(i)
+            trail.append(masks[i])
+        masks[i] = new_mask
+        if mask_counts[new_mask] == 1:
+            solved.append(i)
+        for u in box_units[i]:
+            choice_dirty[u] = True
+            twins_dirty[u] = True
+
+    while True:
+        # Eliminate the values of the boxes solved at the start of the pass from their peers
+        eliminate_boxes, solved = solved, []
+        for i in eliminate_boxes:
+            m = masks[i]
+            for p in peer_indices[i]:
+                if masks[p] & m:
+                    new_mask = masks[p] & ~m
+                    if not new_mask:
+                        return False
+                    change(p, new_mask)
+
+        # Only choice: assign the digits that fit in a single box of a unit, in increasing order
+        for u, unit in enumerate(unit_indices):
+            if not choice_dirty[u]:
+                continue
+            choice_dirty[u] = False
+            singles = _unit_singles(masks, unit)
+            if singles is False:
+                return False
+            while singles:
+                bit = singles & -singles
+                for place in unit:
+                    if masks[place] & bit:
+                        break
+                change(place, bit)
+                # The other digits of the box may now fit in a single box, or none
+                singles = _unit_singles(masks, unit)
+                if singles is False:
+                    return False
+                singles &= ~(bit | (bit - 1))
+
+        # Naked twins: two boxes with the same two candidates take them from the rest of the unit
+        for u, unit in enumerate(unit_indices):
+            if not twins_dirty[u]:
+                continue
+            twins_dirty[u] = False
+            pairs = [i for i in unit if mask_counts[masks[i]] == 2]
+            twins = [(b1, b2) for b1, b2 in itertools.combinations(pairs, 2) if masks[b1] == masks[b2]]
+            for b1, b2 in twins:
+                m = masks[b1]
+                if mask_counts[m] != 2:
+                    # an earlier pair took one of its values: three boxes share two values
+                    return False
+                for i in unit:
+                    if i != b1 and i != b2 and masks[i] & m:
+                        new_mask = masks[i] & ~m
+                        if not new_mask:
+                            return False
+                        change(i, new_mask)
+
+        if not solved:
+            if dirty is not None:
+                dirty[:] = [c or t for c, t in zip(choice_dirty, twins_dirty)]
+            return masks
+
+
+def verify_masks(masks):
+    """
+    Verify that every unit of a board of solved boxes holds all nine digits.
+    """
+    return all(len(set(masks[i] for i in unit)) == 9 for unit in unit_indices)
+
+
+def undo(masks, trail, mark, recorder=None):
+    """
+    Restore the masks changed since the trail was `mark` entries long, most recent change first.
+    """
+    while len(trail) > mark:
+        old = trail.pop()
+        i = trail.pop()
+        masks[i] = old
+        if recorder is not None:
+            recorder.record(i, old)
+
+
+def branch_dirty(dirty, i):
+    """
+    Return the units to check after box i of a stalled board is set: the units left to check when
+    it stalled, and the units of box i.
+    """
+    dirty = dirty[:]
+    for u in box_units[i]:
+        dirty[u] = True
+    return dirty
+
+
+def search_masks(masks, trail=None, recorder=None, dirty=None):
+    """
+    Apply DFS to split and solve a stalled board of candidate masks, like search().
+
+    Rather than copying the board for each branch, the search changes a single board and records
+    each change on a trail; a failed branch is undone back to its choice point.
+    Args:
+        masks(list): the candidate masks, updated in place.
+        trail(collections.deque): the changes made so far by the search, see propagate(). The
+            changes made before the first branch are not trailed unless recording.
+        recorder(AssignmentRecorder): if given, every change and undo is recorded.
+        dirty(list): the units that changed since the board last stalled, see propagate(); all of
+            them if not given.
+    Returns:
+        The solved masks, or False if there is no solution.
+    """
+    if dirty is None:
+        dirty = [True] * len(unit_indices)
+    if trail is None:
+        # A deque keeps the blocks freed by undo() for reuse, where a list
+        # would shrink and grow again as branches fail
+        trail = collections.deque()
+    start = len(trail)
+    # Nothing undoes the changes made at the root, where the trail is still
+    # empty, so they are only trailed for the recorder
+    reduced = propagate(masks, trail if trail or recorder is not None else None, dirty)
+    if recorder is not None:
+        recorder.record_trail(masks, trail, start)
+    if reduced is False:
+        return False
+    if all(mask_counts[m] == 1 for m in masks):
+        if verify_masks(masks):
+            return masks
+        else:
+            print("Erroneous solution reported. Exiting.")
+            display(mask_values(masks))
+            exit(0)
+
+    # Choose one of the unfilled boxes with the fewest possibilities; boxes
+    # are in name order, so ties go to the same box as in search()
+    n, s = min((mask_counts[m], i) for i, m in enumerate(masks) if mask_counts[m] > 1)
+    candidates = masks[s]
+    mark = len(trail)
+    while candidates:
+        bit = candidates & -candidates
+        candidates ^= bit
+        trail.append(s)
+        trail.append(masks[s])
+        masks[s] = bit
+        if recorder is not None:
+            recorder.record(s, bit)
+        if search_masks(masks, trail, recorder, branch_dirty(dirty, s)):
+            return masks
+        undo(masks, trail, mark, recorder)
+    return False
+
+
+def count_solutions(masks, limit=2):
+    """
+    Count the solutions of a board of candidate masks, stopping at `limit`.
+    Args:
+        masks(list): the candidate masks; left unchanged.
+        limit(int): the number of solutions to stop at.
+    Returns:
+        The number of solutions, at most limit.
+    """
+    masks = masks[:]
+    trail = collections.deque()
+    count = 0
+    dirty = [True] * len(unit_indices)
+    # Stack of (box, candidates left to try, trail length and units left to
+    # check at the choice point)
+    stack = []
+    while True:
+        if propagate(masks, trail, dirty) is not False:
+            unsolved = [(mask_counts[m], i) for i, m in enumerate(masks) if mask_counts[m] > 1]
+            if not unsolved:
+                count += 1
+                if count >= limit:
+                    return count
+            else:
+                n, s = min(unsolved)
+                stack.append((s, masks[s], len(trail), dirty[:]))
+        # Try the next candidate of the latest choice point with some left
+        while stack:
+            s, candidates, mark, stalled_dirty = stack.pop()
+            undo(masks, trail, mark)
+            if candidates:
+                bit = candidates & -candidates
+                stack.append((s, candidates ^ bit, mark, stalled_dirty))
+                trail.append(s)
+                trail.append(masks[s])
+                masks[s] = bit
+                dirty = branch_dirty(stalled_dirty, s)
+                break
+        else:
+            return count
+
+
+def solve(grid, recorder=None):
     """
     Find the solution to a Sudoku grid.
     Args:
         grid(string): a string representing a sudoku grid.
             Example: '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+        recorder(AssignmentRecorder): if given, the changes of the search are recorded,
+            e.g., to replay them with visualize.py.
     Returns:
         The dictionary representation of the final sudoku grid. False if no solution exists.
     """
-    board = grid_values(grid)
-    return search(board)
+    masks = grid_masks(grid)
+    if recorder is not None:
+        recorder.start(masks)
+    solved = search_masks(masks, recorder=recorder)
+    if not solved:
+        return solved
+    return mask_values(solved)
+
+
+# Batch solving
+#
+# solve_many() solves a stream of grids on a pool of worker processes. Grids
+# are sent to the workers in chunks, to amortise the pickling, and at most two
+# windows of one chunk per worker are in flight, so a file of any size is read
+# as the results are consumed rather than all at once.
+
+class BatchStats(object):
+    """
+    The solve times of a solve_many() run, filled in as its results are consumed.
+    Attributes:
+        times(list): the seconds each grid took to solve, in input order.
+        elapsed(float): the wall-clock seconds since the run started.
+    """
+    def __init__(self):
+        self.times = []
+        self.elapsed = 0.
+
+    def throughput(self):
+        """
+        Return the number of grids solved per second of wall-clock time.
+        """
+        return len(self.times) / self.elapsed if self.elapsed else 0.
+
+    def percentile(self, p):
+        """
+        Return the p-th percentile (0-100, nearest rank) of the solve times.
+        """
+        if not self.times:
+            return 0.
+        ordered = sorted(self.times)
+        return ordered[max(0, int(-(-p * len(ordered) // 100)) - 1)]
+
+    def summary(self):
+        """
+        Return a one line report of the throughput and the p50/p99 solve times.
+        """
+        return '{} grids in {:.2f}s: {:.1f} grids/s, p50 {:.2f}ms, p99 {:.2f}ms'.format(
+            len(self.times), self.elapsed, self.throughput(),
+            1000. * self.percentile(50), 1000. * self.percentile(99))
+
+
+def read_grids(path):
+    """
+    Yield the grids of a file holding one grid string per line, skipping blank lines.
+    """
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
+
+def _solve_chunk(grids):
+    """
+    Solve a chunk of grids in a worker process; return (solution, seconds) pairs.
+    """
+    results = []
+    for grid in grids:
+        start = timeit.default_timer()
+        solved = solve(grid)
+        results.append((solved, timeit.default_timer() - start))
+    return results
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def solve_many(grids, processes=None, chunksize=64, stats=None):
+    """
+    Solve many Sudoku grids on a pool of worker processes.
+    Args:
+        grids: an iterable of grid strings, or the path of a file with one grid per line.
+        processes(int): the number of worker processes; the number of cores by default.
+            With 1 the grids are solved in this process.
+        chunksize(int): the number of grids sent to a worker at a time.
+        stats(BatchStats): if given, records the solve times and the elapsed time.
+    Returns:
+        A generator of the solve() result of each grid, in input order.
+    """
+    if isinstance(grids, str):
+        grids = read_grids(grids)
+    if processes is None:
+        processes = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') \
+            else multiprocessing.cpu_count()
+    if stats is None:
+        stats = BatchStats()
+    start = timeit.default_timer()
+    windows = _chunks(_chunks(grids, chunksize), processes)
+
+    def consume(results):
+        for chunk in results:
+            for solved, seconds in chunk:
+                stats.times.append(seconds)
+                stats.elapsed = timeit.default_timer() - start
+                yield solved
+
+    if processes == 1:
+        for window in windows:
+            yield from consume(map(_solve_chunk, window))
+        return
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        pending = collections.deque()
+        for window in windows:
+            pending.append(pool.map_async(_solve_chunk, window))
+            if len(pending) > 1:
+                yield from consume(pending.popleft().get())
+        while pending:
+            yield from consume(pending.popleft().get())
+    finally:
+        pool.terminate()
 
 
 if __name__ == '__main__':
 
+    if len(sys.argv) > 1:
+        # Solve a file of grids and report the throughput
+        stats = BatchStats()
+        unsolved = sum(1 for solved in solve_many(sys.argv[1], stats=stats) if not solved)
+        print(stats.summary())
+        if unsolved:
+            print('{} grids have no solution'.format(unsolved))
+        sys.exit(0)
+
     diag_sudoku_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
-    solved = solve(diag_sudoku_grid)
+    assignments = AssignmentRecorder()
+    solved = solve(diag_sudoku_grid, assignments)
 
     if not solved:
         print("No solution could be found")
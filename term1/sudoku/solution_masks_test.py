@@ -0,0 +1,140 @@
+import os
+import random
+import tempfile
+import unittest
+
+import solution
+import solution_test
+
+
+def random_puzzles(count, seed=0):
+    """ Generate diagonal sudoku grids by blanking boxes of a solved grid. """
+    solved = solution_test.TestDiagonalSudoku.solved_diag_sudoku
+    full = ''.join(solved[s] for s in solution.boxes)
+    rng = random.Random(seed)
+    for _ in range(count):
+        blanks = set(rng.sample(range(81), rng.randint(20, 60)))
+        yield ''.join('.' if i in blanks else c for i, c in enumerate(full))
+
+
+class TestMaskSolver(unittest.TestCase):
+
+    def test_conversion(self):
+        grid = solution_test.TestDiagonalSudoku.diagonal_grid
+        self.assertEqual(solution.mask_values(solution.grid_masks(grid)), solution.grid_values(grid))
+        # the masks are in the order of the grid, whatever the order of the dict of values
+        self.assertEqual(solution.grid_masks(grid),
+                         [solution.digit_masks.get(c, solution.ALL_DIGITS) for c in grid])
+
+    def test_propagate(self):
+        grid = solution_test.TestDiagonalSudoku.diagonal_grid
+        masks = solution.propagate(solution.grid_masks(grid))
+        # the values left must still allow the solution
+        solved = solution_test.TestDiagonalSudoku.solved_diag_sudoku
+        for s, m in zip(solution.boxes, masks):
+            self.assertIn(solved[s], solution.mask_digits[m])
+        # two 2s in the first row
+        self.assertFalse(solution.propagate(solution.grid_masks('22' + grid[2:])))
+
+    def test_propagate_dirty(self):
+        for grid in random_puzzles(30):
+            masks = solution.grid_masks(grid)
+            dirty = [True] * len(solution.unitlist)
+            if not solution.propagate(masks, dirty=dirty):
+                continue
+            self.assertEqual(masks, solution.propagate(solution.grid_masks(grid)))
+            for s, m in enumerate(masks):
+                if solution.mask_counts[m] > 1:
+                    # checking only the units left dirty reaches the same board as checking all
+                    branched = masks[:]
+                    branched[s] = m & -m
+                    expected = solution.propagate(branched[:])
+                    self.assertEqual(solution.propagate(branched, dirty=solution.branch_dirty(dirty, s)),
+                                     expected)
+
+    def test_undo(self):
+        for grid in random_puzzles(10):
+            masks = solution.grid_masks(grid)
+            trail = []
+            solution.propagate(masks, trail=trail)
+            self.assertEqual(len(trail) % 2, 0)
+            solution.undo(masks, trail, 0)
+            self.assertEqual(masks, solution.grid_masks(grid))
+            self.assertEqual(trail, [])
+
+    def test_count_solutions(self):
+        grid = solution_test.TestDiagonalSudoku.diagonal_grid
+        masks = solution.grid_masks(grid)
+        self.assertEqual(solution.count_solutions(masks), 1)
+        self.assertEqual(masks, solution.grid_masks(grid))
+        self.assertEqual(solution.count_solutions(solution.grid_masks('.' * 81), 5), 5)
+        self.assertEqual(solution.count_solutions(solution.grid_masks('22' + grid[2:])), 0)
+
+    def test_solve_matches_dict_solver(self):
+        for grid in random_puzzles(30):
+            solved = solution.solve(grid)
+            self.assertTrue(solution.verify(solved))
+            for s, c in zip(solution.boxes, grid):
+                self.assertIn(c, '.' + solved[s])
+            self.assertEqual(solved, solution.search(solution.grid_values(grid)))
+
+    def test_solve_many(self):
+        grids = list(random_puzzles(20))
+        grids.append('22' + grids[0][2:])
+        expected = [solution.solve(grid) for grid in grids]
+        for processes in (1, 2):
+            stats = solution.BatchStats()
+            results = solution.solve_many(iter(grids), processes=processes, chunksize=3,
+                                          stats=stats)
+            self.assertEqual(list(results), expected)
+            self.assertEqual(len(stats.times), len(grids))
+            self.assertGreater(stats.throughput(), 0)
+            self.assertLessEqual(stats.percentile(50), stats.percentile(99))
+            self.assertEqual(stats.percentile(100), max(stats.times))
+
+    def test_solve_many_file(self):
+        grids = list(random_puzzles(5))
+        fd, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write('\n'.join(grids) + '\n\n')
+            self.assertEqual(list(solution.solve_many(path, processes=1)),
+                             [solution.solve(grid) for grid in grids])
+        finally:
+            os.remove(path)
+
+
+    def test_recorder(self):
+        grids = [solution_test.TestDiagonalSudoku.diagonal_grid,
+                 '....45...853....4...18..57.576....9.......65...........4...9..5.....1.....85....3']
+        for grid in grids + list(random_puzzles(5)):
+            recorder = solution.AssignmentRecorder()
+            solved = solution.solve(grid, recorder)
+            self.assertEqual(solved, solution.solve(grid))
+            snapshots = list(recorder)
+            self.assertEqual(len(snapshots), len(recorder))
+            self.assertEqual(snapshots[-1], solved)
+
+    def test_record_trail(self):
+        class ChangeRecorder(solution.AssignmentRecorder):
+            def __init__(self):
+                super().__init__()
+                self.changes = []
+
+            def record(self, i, mask):
+                self.changes.append((i, mask))
+
+        for grid in random_puzzles(10):
+            masks = solution.grid_masks(grid)
+            board = masks[:]
+            trail = [0, masks[0]]
+            solution.propagate(masks, trail)
+            recorder = ChangeRecorder()
+            recorder.record_trail(masks, trail, 2)
+            self.assertEqual(len(recorder.changes), len(trail) // 2 - 1)
+            for i, mask in recorder.changes:
+                board[i] = mask
+            self.assertEqual(board, masks)
+
+if __name__ == '__main__':
+    unittest.main()